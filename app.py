@@ -1,20 +1,45 @@
 import streamlit as st
 import cv2
+import os
 import random
-import time  # For sleep in live video processing
-from utils.model_utils import get_model, get_keypoints_from_frame
-from utils.angle_utils import calculate_joint_angles, calculate_joint_distances
-from utils.video_utils import save_video, plot_joint_angles
+import tempfile
+import time
+import numpy as np
+from utils.inference_server import get_inference_server
+from utils.angle_utils import (
+    calculate_joint_distances,
+    calculate_joint_angles_batch, calculate_joint_distances_batch,
+    values_to_dict, ANGLE_NAMES, DISTANCE_NAMES,
+)
+from utils.video_utils import spool_upload, plot_joint_summary
 from utils.exercise_rules import check_exercise_form, get_exercise_strategy
 from utils.feedback_utils import FeedbackManager
 from utils.chat_utils import get_ai_recommendation
 from utils.voice_utils import play_audio_feedback
+from utils.video_pipeline import analyze_video
+from utils.parallel_analysis import analyze_video_parallel
+from utils.live_pipeline import LivePipeline
+from utils.profiling_utils import Profiler, available_capture_modes, render_debug_panel
+from utils.joint_series import JointSeriesStore
+from utils.keypoint_filter import KeypointFilter, smooth_keypoint_series
+from utils.person_tracker import PersonSession, PersonTracker
+from utils.roi_inference import RoiPoseModel
+from utils.inference_scheduler import InferenceScheduler
+from utils.overlay_renderer import OverlayRenderer
+from utils.keypoint_cache import get_keypoint_cache
+from utils.webrtc_stream import FrameReceiverCapture, TrackReceiver, create_synthetic_track, ice_servers
 
 # List of available exercises (strategies)
 available_exercises = ['push-up', 'squat', 'bicep curl', 'lunge', 'overhead press', 'easy exercise']
 
-# Load YOLO model
-model = get_model()
+# Live sessions keep the last 10 minutes of joint angles at up to 30 fps
+LIVE_HISTORY_FRAMES = 10 * 60 * 30
+
+# Multi-person sets keep the sessions of at most this many people; the ones gone with the least history go first
+MAX_RETAINED_PEOPLE = 16
+
+# Shared inference server: frames from every session are micro-batched through one model
+model = get_inference_server()
 
 # Initialize session state variables if not already initialized
 def initialize_session_state():
@@ -31,6 +56,8 @@ def initialize_session_state():
         st.session_state['user_input'] = ''  # Initialize user_input
         st.session_state['ai_response'] = ''
         st.session_state['stop_live_exercise'] = False  # For stopping live exercise
+        st.session_state['profiler'] = Profiler()  # Per-session stage timings
+        st.session_state['strategy_instances'] = {}  # Exercise strategies reused across frames and reruns
 
 
 # def play_audio_feedback(feedback):
@@ -126,100 +153,286 @@ def video_analysis():
     st.session_state['feedback_manager'].reset_feedback()
 
     # Option to choose input method
-    input_method = st.radio("Choose Input Method:", ('Upload Video', 'Live Exercise'), key='input_method')
+    input_method = st.radio("Choose Input Method:", ('Upload Video', 'Live Exercise', 'Live Exercise (browser camera)'),
+                            key='input_method')
 
     if input_method == 'Upload Video':
         uploaded_video = st.file_uploader("Upload a video for analysis", type=["mp4", "avi", "mov"], key='video_uploader')
+        with st.expander("Analysis settings"):
+            target_fps = st.slider("Frames analysed per second", 1, 30, 10, key='analysis_fps')
+            # The shared inference server never batches more than its INFERENCE_MAX_BATCH frames
+            max_batch_size = model.max_batch_size
+            batch_size = st.slider("Inference batch size", 1, max_batch_size, max_batch_size,
+                                   key='analysis_batch_size') if max_batch_size > 1 else 1
+            preview_every = st.slider("Show a preview every N analysed frames", 1, 30, 5, key='analysis_preview_every')
+            skip_still = st.checkbox("Analyse fewer frames while you're not moving", value=True, key='analysis_skip_still')
+            parallel = st.checkbox("Use every CPU core (long videos)", key='analysis_parallel',
+                                   help="Analyses parts of the video in parallel worker processes, without previews.")
         if uploaded_video is not None:
-            process_video(uploaded_video)
-    elif input_method == 'Live Exercise':
-        start_live_exercise = st.button("Start Live Exercise", key='start_live_exercise')
-        if start_live_exercise:
-            st.session_state['stop_live_exercise'] = False  # Reset the stop flag
-            process_live_video()
-
-def process_video(uploaded_video):
-    # Save uploaded video
-    video_path = save_video(uploaded_video)
-
-    cap = cv2.VideoCapture(video_path)
+            process_video(uploaded_video, target_fps=target_fps, batch_size=batch_size, preview_every=preview_every,
+                          skip_still=skip_still, parallel=parallel)
+    else:
+        browser_camera = input_method == 'Live Exercise (browser camera)'
+        multi_person = st.checkbox("Track everyone in frame", key='multi_person',
+                                   help="Gives each person their own rep count and feedback (no audio).")
+        roi_mode = st.checkbox("Fast mode: analyse only the area around you", value=True, key='roi_mode',
+                               disabled=multi_person, help="Searches the whole frame only every second or so.")
+        with st.expander("Live settings"):
+            latency_budget_ms = st.slider("Inference latency budget (ms)", 30, 300, 100, step=10, key='latency_budget_ms',
+                                          help="The model input size shrinks until inference fits this budget.")
+            preview_width = st.select_slider("Preview width (px)", (320, 480, 640, 960, 1280), 640, key='preview_width')
+            preview_fps = st.slider("Preview frames per second", 5, 30, 15, key='preview_fps')
+            # The browser shows its own camera: by default only the skeleton travels back
+            preview_camera = st.checkbox("Include the camera image in the preview", value=not browser_camera,
+                                         key='preview_camera')
+        live_settings = dict(multi_person=multi_person, roi_mode=roi_mode and not multi_person,
+                             latency_budget_ms=latency_budget_ms, preview_width=preview_width, preview_fps=preview_fps,
+                             preview_camera=preview_camera)
+        if browser_camera:
+            capture = open_browser_camera()
+            if capture is not None:
+                process_live_video(capture=capture, **live_settings)
+        else:
+            start_live_exercise = st.button("Start Live Exercise", key='start_live_exercise')
+            if start_live_exercise:
+                st.session_state['stop_live_exercise'] = False  # Reset the stop flag
+                process_live_video(**live_settings)
+
+def open_browser_camera():
+    """
+    Streams the camera from the browser over WebRTC (streamlit-webrtc), for deployments where the
+    server has no camera. Returns a capture for process_live_video while the stream plays, else None.
+    With "Synthetic browser camera" in the sidebar, a generated squat video stands in for the browser.
+    """
+    if st.session_state.get('synthetic_camera'):
+        if not st.button("Start Live Exercise", key='start_synthetic_exercise'):
+            return None
+        from benchmarks.synthetic import write_synthetic_video
+        video_path = write_synthetic_video(os.path.join(tempfile.gettempdir(), 'deezsquats_synthetic.mp4'), num_frames=300)
+        return FrameReceiverCapture(TrackReceiver(create_synthetic_track(video_path)), owns_receiver=True)
+
+    try:
+        from streamlit_webrtc import WebRtcMode, webrtc_streamer
+    except ImportError:
+        st.error("The browser camera needs `pip install streamlit-webrtc`.")
+        return None
+    # Send-only: frames go browser -> server, and only feedback and the small preview come back
+    context = webrtc_streamer(key='browser_camera', mode=WebRtcMode.SENDONLY,
+                              media_stream_constraints={'video': True, 'audio': False},
+                              rtc_configuration={'iceServers': ice_servers()})
+    if not context.state.playing or context.video_receiver is None:
+        st.write("Press START and allow camera access to begin.")
+        return None
+    return FrameReceiverCapture(context.video_receiver, is_playing=lambda: context.state.playing)
+
+def process_video(uploaded_video, target_fps=10, batch_size=8, preview_every=5, skip_still=True, parallel=False):
+    # Stream the upload to this session's own temporary file (deleted when the analysis ends)
+    try:
+        upload = spool_upload(uploaded_video)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    video_path = upload.path
+
     stframe = st.empty()
     feedback_placeholder = st.empty()
     message_placeholder = st.empty()  # Add message placeholder
 
-    # Joint angle data storage
-    joint_angle_data = {joint: [] for joint in [
-        'Right Elbow', 'Left Elbow', 'Right Knee', 'Left Knee',
-        'Right Hip', 'Left Hip', 'Right Shoulder Flexion', 'Left Shoulder Flexion',
-        'Spine Angle', 'Right Ankle Dorsiflexion', 'Left Ankle Dorsiflexion'
-    ]}
+    profiler = st.session_state['profiler']
+    debug_placeholder = st.empty()
 
-    frame_rate = cap.get(cv2.CAP_PROP_FPS) or 30  # Default to 30 if frame rate is not available
-    feedback_interval_seconds = 0.5
-    feedback_frame_interval = int(frame_rate * feedback_interval_seconds)
+    renderer = OverlayRenderer(max_fps=None)  # analyze_video already decides how often to preview
 
-    frame_count = 0
-    last_feedback_frame = 0
+    def show_preview(frame, result):
+        with profiler.span('preview'):
+            people = list(result.keypoints) if result is not None else []
+            stframe.image(renderer.render(frame, people))
+        if st.session_state.get('show_debug_panel'):
+            render_debug_panel(profiler, debug_placeholder)
 
     try:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                st.write("Video ended or failed to read.")
-                break
+        start_profile_capture(profiler)
+        # The same upload analysed again (e.g. as another exercise) reuses its keypoints from disk.
+        # Batch size and previews don't change the keypoints, so they aren't part of the key. Skipping still
+        # frames can pick slightly different frames per segment, so parallel runs get their own entries then.
+        cache = get_keypoint_cache()
+        analysis = None
+        if cache is not None:
+            with profiler.span('cache_lookup'):
+                settings = {'target_fps': target_fps, 'skip_still': skip_still}
+                if skip_still:
+                    settings['parallel'] = parallel
+                cache_key = cache.key(upload.digest, model, settings)
+                analysis = cache.get(cache_key)
+
+        if analysis is None:
+            # Decode on a background thread and run YOLO in batches on a subsampled stream
+            message_placeholder.write("Analyzing video...")
+            # Offline there's no real-time budget: keep the model's input size, only thin out still stretches
+            # aligned: the frames picked don't depend on where a segment starts (see analyze_video_parallel)
+            scheduler_options = dict(min_fps=min(2, target_fps), max_fps=target_fps, adapt_imgsz=False, aligned=True)
+            if parallel:
+                progress = st.progress(0.0)
+                analysis = analyze_video_parallel(video_path, batch_size=batch_size, target_fps=target_fps,
+                                                  scheduler_options=scheduler_options if skip_still else None,
+                                                  on_progress=lambda done, total: progress.progress(done / total),
+                                                  profiler=profiler)
+                progress.empty()
+            else:
+                scheduler = InferenceScheduler(profiler=profiler, **scheduler_options) if skip_still else None
+                analysis = analyze_video(video_path, model, batch_size=batch_size, target_fps=target_fps,
+                                         preview_every=preview_every, on_preview=show_preview, profiler=profiler,
+                                         scheduler=scheduler)
+            if cache is not None and len(analysis['keypoints']):
+                with profiler.span('cache_store'):
+                    cache.put(cache_key, analysis)
+            message_placeholder.empty()
 
-            process_frame(frame, joint_angle_data, frame_count, last_feedback_frame, feedback_interval_seconds, feedback_placeholder, stframe, message_placeholder)
-            frame_count += 1
+        keypoints = analysis['keypoints']
+        if len(keypoints) == 0:
+            st.write("Video ended or failed to read.")
+            return
+
+        timestamps = analysis['timestamps']
+        with profiler.span('filter'):
+            # Smooth keypoint jitter and bridge short dropouts, so low analysis rates still give stable angles
+            keypoints = smooth_keypoint_series(keypoints, timestamps)
+        with profiler.span('angles'):
+            angles = calculate_joint_angles_batch(keypoints)
+            distances = calculate_joint_distances_batch(keypoints)
+
+        # Replay the form checks at the feedback interval using video time
+        feedback_interval_seconds = 0.5
+        exercise_strategy = get_exercise_strategy(st.session_state['selected_exercise'],
+                                                  st.session_state['strategy_instances'])
+        exercise_strategy.reset()
+        checked_rows = []
+        last_feedback_time = None
+        for row, (angle_row, timestamp) in enumerate(zip(angles, timestamps)):
+            if np.isnan(angle_row).all():
+                continue
+            if last_feedback_time is not None and timestamp - last_feedback_time < feedback_interval_seconds:
+                continue
+            checked_rows.append(row)
+            last_feedback_time = timestamp
+
+        with profiler.span('check_form'):
+            if hasattr(exercise_strategy, 'check_form_series'):
+                # Rule-based strategies follow the reps over every frame and check the sampled ones in one batch
+                all_violations = exercise_strategy.check_form_series(angles, distances, timestamps, checked_rows)
+            else:
+                all_violations = [exercise_strategy.check_form(values_to_dict(angles[row], ANGLE_NAMES),
+                                                               values_to_dict(distances[row], DISTANCE_NAMES))
+                                  for row in checked_rows]
+        with profiler.span('feedback'):
+            for row, violations in zip(checked_rows, all_violations):
+                st.session_state['feedback_manager'].update_feedback(violations, current_time=timestamps[row])
+
+        latest_feedback = st.session_state['feedback_manager'].current_feedback_message
+        if latest_feedback:
+            feedback_placeholder.write("Form Issue Detected:\n" + latest_feedback)
+
+        if exercise_strategy.rep_count is not None:
+            st.write(f"Reps completed: {exercise_strategy.rep_count}")
+
+        stats = analysis['stats']
+        if stats.get('cached'):
+            st.write(f"Reused the keypoints of {stats['frames_analysed']} frames from an earlier analysis of this video.")
+        else:
+            workers = f", {stats['segments']} segments on {stats['workers']} workers" if 'workers' in stats else ""
+            st.write(f"Analyzed {stats['frames_analysed']} frames in {stats['elapsed_seconds']:.1f}s "
+                     f"({stats['analysed_fps']:.1f} frames/s, {stats['frames_skipped']} still frames skipped{workers}).")
 
-        cap.release()
-        cv2.destroyAllWindows()
+        # Joint angle time series (wraps the batch result, no copy)
+        joint_angle_data = JointSeriesStore.from_arrays(angles, timestamps)
 
         # Post-processing steps
+        finish_profile_capture(profiler, debug_placeholder)
         post_exercise_analysis(joint_angle_data)
 
     except Exception as e:
         st.write(f"An error occurred during video processing: {e}")
-        cap.release()
-        cv2.destroyAllWindows()
-
-def process_live_video():
-    cap = cv2.VideoCapture(0)  # Capture from the webcam
+    finally:
+        profiler.stop_capture()
+        upload.cleanup()
+
+def process_live_video(capture=None, multi_person=False, roi_mode=False, latency_budget_ms=100, preview_width=640,
+                       preview_fps=15, preview_camera=True):
+    # Capture from the server's webcam unless a (browser) capture is given
+    cap = capture if capture is not None else cv2.VideoCapture(0)
     stframe = st.empty() 
     feedback_placeholder = st.empty()
     message_placeholder = st.empty()  # Add message placeholder
+    debug_placeholder = st.empty()
 
     # **Add a 'Stop' button**
     stop_button = st.button("Stop Live Exercise", key='stop_live_exercise_button')
 
-    # Joint angle data storage
-    joint_angle_data = {joint: [] for joint in [
-        'Right Elbow', 'Left Elbow', 'Right Knee', 'Left Knee',
-        'Right Hip', 'Left Hip', 'Right Shoulder Flexion', 'Left Shoulder Flexion',
-        'Spine Angle', 'Right Ankle Dorsiflexion', 'Left Ankle Dorsiflexion'
-    ]}
+    # Joint angle time series: a fixed-size ring buffer, so memory stays bounded however long the session runs
+    joint_angle_data = JointSeriesStore(ring_capacity=LIVE_HISTORY_FRAMES)
 
-    frame_rate = 10  # Lower frame rate for processing
     feedback_interval_seconds = 0.5
-    feedback_frame_interval = int(frame_rate * feedback_interval_seconds)
 
     frame_count = 0
-    last_feedback_frame = 0
+    last_feedback_time = 0
 
-    try:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                st.write("Failed to capture frame from camera.")
-                break
+    # A new set: clear any state the strategy kept from a previous one
+    get_exercise_strategy(st.session_state['selected_exercise'], st.session_state['strategy_instances']).reset()
 
-            # Flip the frame horizontally for a mirror effect
-            frame = cv2.flip(frame, 1)
+    profiler = st.session_state['profiler']
 
-            process_frame(frame, joint_angle_data, frame_count, last_feedback_frame, feedback_frame_interval, feedback_placeholder, stframe, message_placeholder)
+    tracker = None
+    if multi_person:
+        # Read here: the tracker creates sessions on the inference thread, which has no session_state
+        exercise = st.session_state['selected_exercise']
+
+        def new_person_session(track_id):
+            return PersonSession(track_id, get_exercise_strategy(exercise), FeedbackManager(),
+                                 JointSeriesStore(ring_capacity=LIVE_HISTORY_FRAMES))
+
+        tracker = PersonTracker(session_factory=new_person_session)
+    people = {}  # track id -> PersonSession of everyone seen this set
+
+    # In ROI mode most frames are inferred on a small crop around the person instead of the full frame
+    live_model = RoiPoseModel(model, profiler=profiler) if roi_mode else model
+
+    # Inference rate follows the user's movement, input size the measured inference time
+    scheduler = InferenceScheduler(latency_budget_ms=latency_budget_ms, profiler=profiler)
+
+    # Previews are drawn from our own keypoints on a reused, downscaled buffer and sent as JPEG
+    renderer = OverlayRenderer(max_width=preview_width, max_fps=preview_fps, draw_frame=preview_camera)
+
+    # Capture and inference run on their own threads; this loop only renders the newest result
+    # Keypoints are smoothed (and short dropouts bridged) before angles are computed
+    pipeline = LivePipeline(cap, live_model, profiler=profiler, keypoint_filter=KeypointFilter(), tracker=tracker,
+                            scheduler=scheduler).start()
+    try:
+        start_profile_capture(profiler)
+        while cap.isOpened():
+            result = pipeline.next_result(timeout=1.0)
+            if result is None:
+                if not pipeline.running:
+                    st.write("Failed to capture frame from camera.")
+                    break
+                continue
+
+            with profiler.span('render_total'):
+                if not result['inferred']:
+                    # Frame the scheduler skipped: keep the video moving with the last overlay, the analysis
+                    # waits for the next inference
+                    show_frame(result['frame'], None, stframe, renderer, profiler)
+                elif tracker is not None:
+                    process_people(result['frame'], result['people'], renderer, people, feedback_interval_seconds,
+                                   feedback_placeholder, stframe, message_placeholder, profiler)
+                else:
+                    last_feedback_time = process_frame(result['frame'], result['keypoints'], renderer, joint_angle_data,
+                                                       last_feedback_time, feedback_interval_seconds,
+                                                       feedback_placeholder, stframe, message_placeholder, profiler)
+            pipeline.record_latency(result)
             frame_count += 1
 
-            # Add a small delay
-            time.sleep(1 / frame_rate)
+            if frame_count % 30 == 0 and st.session_state.get('show_debug_panel'):
+                render_debug_panel(profiler, debug_placeholder)
 
             # Check if 'Stop' button is pressed
             if st.session_state.get('stop_live_exercise'):
@@ -230,74 +443,194 @@ def process_live_video():
             if stop_button:
                 st.session_state['stop_live_exercise'] = True
 
+        pipeline.stop()
         cap.release()
         cv2.destroyAllWindows()
 
         # Post-processing steps
-        post_exercise_analysis(joint_angle_data)
+        finish_profile_capture(profiler, debug_placeholder)
+        post_exercise_analysis(joint_angle_data, people if tracker is not None else None)
 
     except Exception as e:
         st.write(f"An error occurred during live video processing: {e}")
+    finally:
+        # Also runs when Streamlit interrupts the script (e.g. the Stop button triggers a rerun)
+        profiler.stop_capture()
+        pipeline.stop()
         cap.release()
         cv2.destroyAllWindows()
 
-def process_frame(frame, joint_angle_data, frame_count, last_feedback_frame, feedback_frame_interval, feedback_placeholder, stframe, message_placeholder):
-    keypoints, results = get_keypoints_from_frame(frame, model)
-    if keypoints is not None and any(kp is not None for kp in keypoints):
-        joint_angles = calculate_joint_angles(keypoints)
-        joint_distances = calculate_joint_distances(keypoints)
+def process_frame(frame, keypoints, renderer, joint_angle_data, last_feedback_time, feedback_interval_seconds, feedback_placeholder, stframe, message_placeholder, profiler):
+    """Analyzes and renders one frame whose keypoints were already inferred. Returns the updated last feedback time."""
+    if keypoints is not None:
+        with profiler.span('angles'):
+            angle_row = calculate_joint_angles_batch(keypoints)
+            joint_angles = values_to_dict(angle_row, ANGLE_NAMES)
+            joint_distances = calculate_joint_distances(keypoints)
 
+        current_time = time.time()
         if joint_angles:
-            message_placeholder.empty()
-
-            for joint, angle in joint_angles.items():
-                joint_angle_data[joint].append(angle)
-
-            if frame_count - last_feedback_frame >= feedback_frame_interval:
-                exercise_strategy = get_exercise_strategy(st.session_state['selected_exercise'])
-                violations = exercise_strategy.check_form(joint_angles, joint_distances)
-
-                current_feedback = st.session_state['feedback_manager'].update_feedback(violations)
-
-                if current_feedback and current_feedback[0]:
-                    latest_feedback = current_feedback[-1]
-                    feedback_text = "Form Issue Detected:\n" + latest_feedback
-                    feedback_placeholder.write(feedback_text)
-                    play_audio_feedback(latest_feedback)  # Play audio feedback
-                else:
-                    feedback_placeholder.empty()
-                    play_audio_feedback(None)  # Stop audio feedback
-
-                last_feedback_frame = frame_count
+            joint_angle_data.append(angle_row, current_time)
+
+            exercise_strategy = get_exercise_strategy(st.session_state['selected_exercise'],
+                                                      st.session_state['strategy_instances'])
+            with profiler.span('phase'):
+                # Every frame goes to the rep detector; phase rules are judged at each rep's turning points
+                exercise_strategy.observe(angle_row, current_time)
+            if exercise_strategy.rep_count is not None:
+                message_placeholder.write(f"Reps: {exercise_strategy.rep_count}")
+            else:
+                message_placeholder.empty()
+
+            if current_time - last_feedback_time >= feedback_interval_seconds:
+                with profiler.span('check_form'):
+                    violations = exercise_strategy.check_form(joint_angles, joint_distances)
+
+                with profiler.span('feedback'):
+                    current_feedback = st.session_state['feedback_manager'].update_feedback(violations)
+
+                with profiler.span('audio'):
+                    if current_feedback and current_feedback[0]:
+                        latest_feedback = current_feedback[-1]
+                        feedback_text = "Form Issue Detected:\n" + latest_feedback
+                        feedback_placeholder.write(feedback_text)
+                        play_audio_feedback(latest_feedback)  # Play audio feedback
+                    else:
+                        feedback_placeholder.empty()
+                        play_audio_feedback(None)  # Stop audio feedback
+
+                last_feedback_time = current_time
         else:
             message_placeholder.write("Not enough keypoints detected to calculate joint angles.")
             feedback_placeholder.empty()
 
-        if results is not None and len(results) > 0 and hasattr(results[0], 'plot'):
-            annotated_frame = results[0].plot()
-            annotated_frame_bgr = cv2.cvtColor(annotated_frame, cv2.COLOR_RGB2BGR)
-            stframe.image(annotated_frame_bgr, channels="BGR")
-        else:
-            stframe.image(frame, channels="BGR")
+        show_frame(frame, ([keypoints], [angle_row]), stframe, renderer, profiler)
+    else:
+        message_placeholder.write("No keypoints detected in the current frame.")
+        show_frame(frame, ([], []), stframe, renderer, profiler)
+        feedback_placeholder.empty()
+    return last_feedback_time
+
+def show_frame(frame, overlay, stframe, renderer, profiler):
+    """
+    Shows a frame with its pose overlay: (keypoints, angle rows[, labels]) per person, or None to
+    redraw the last one. Frames beyond the preview rate are skipped without being drawn.
+    """
+    with profiler.span('render_overlay'):
+        jpeg = renderer.render(frame, *overlay) if overlay is not None else renderer.render(frame, None)
+    if jpeg is not None:
+        with profiler.span('display'):
+            stframe.image(jpeg)
+
+def process_people(frame, people, renderer, sessions, feedback_interval_seconds, feedback_placeholder, stframe, message_placeholder, profiler):
+    """
+    Multi-person version of process_frame: every tracked person gets their own angle history, rep
+    count and feedback, from the one inference pass. Feedback is shown as text only, so voices
+    for different people never talk over each other.
+    """
+    current_time = time.time()
+    rep_lines = []
+    feedback_lines = []
+    overlay = ([], [], [])
+    for person in people or ():
+        session = person['session']
+        sessions[person['id']] = session
+        with profiler.span('angles'):
+            angle_row = calculate_joint_angles_batch(person['keypoints'])
+            joint_angles = values_to_dict(angle_row, ANGLE_NAMES)
+        overlay[0].append(person['keypoints'])
+        overlay[1].append(angle_row)
+        overlay[2].append(f"#{person['id']}")
+        if not joint_angles:
+            continue
+        session.joint_angle_data.append(angle_row, current_time)
+        with profiler.span('phase'):
+            session.strategy.observe(angle_row, current_time)
+        if session.strategy.rep_count is not None:
+            rep_lines.append(f"Person {person['id']}: {session.strategy.rep_count} reps")
+
+        if current_time - session.last_feedback_time >= feedback_interval_seconds:
+            with profiler.span('check_form'):
+                violations = session.strategy.check_form(joint_angles, calculate_joint_distances(person['keypoints']))
+            with profiler.span('feedback'):
+                current_feedback = session.feedback_manager.update_feedback(violations)
+            session.feedback_message = current_feedback[-1] if current_feedback and current_feedback[0] else None
+            session.last_feedback_time = current_time
+        if session.feedback_message:
+            feedback_lines.append(f"Person {person['id']}: {session.feedback_message}")
+
+    if len(sessions) > MAX_RETAINED_PEOPLE:
+        # Track IDs churn as people leave and re-enter: keep memory bounded by dropping the sessions of
+        # people no longer in frame, shortest history first (flickering detections)
+        current = {person['id'] for person in people or ()}
+        gone = sorted((track_id for track_id in sessions if track_id not in current),
+                      key=lambda track_id: len(sessions[track_id].joint_angle_data))
+        for track_id in gone[:len(sessions) - MAX_RETAINED_PEOPLE]:
+            del sessions[track_id]
+
+    if people:
+        message_placeholder.write("  \n".join(rep_lines) if rep_lines else f"Tracking {len(people)} people")
     else:
         message_placeholder.write("No keypoints detected in the current frame.")
-        stframe.image(frame, channels="BGR")
+    if feedback_lines:
+        feedback_placeholder.write("Form Issues Detected:  \n" + "  \n".join(feedback_lines))
+    else:
         feedback_placeholder.empty()
 
-def post_exercise_analysis(joint_angle_data):
-    # Plot joint angles over time
-    st.write("### Joint Angles Over Time")
-    for joint, angles in joint_angle_data.items():
-        if any(angles):
-            plot_joint_angles(angles, joint)
-
-    # Show accumulated feedback at the end
-    st.write("### Summary of All Form Feedback")
-    all_feedback = st.session_state['feedback_manager'].get_all_feedback()
-    if all_feedback:
-        st.write(all_feedback)
+    show_frame(frame, overlay, stframe, renderer, profiler)
+
+def start_profile_capture(profiler):
+    """Starts a cProfile/pyinstrument capture if one was chosen in the sidebar."""
+    profiler.reset()
+    capture_mode = st.session_state.get('profile_capture', 'off')
+    if capture_mode != 'off':
+        if profiler.start_capture(capture_mode) != capture_mode:
+            st.warning(f"{capture_mode} isn't installed; profiling with cProfile instead.")
+
+def finish_profile_capture(profiler, debug_placeholder):
+    """Shows the final debug panel, profiler report and metric exports."""
+    report = profiler.stop_capture()
+    if not st.session_state.get('show_debug_panel'):
+        return
+    render_debug_panel(profiler, debug_placeholder)
+    with st.expander("Performance details"):
+        if report:
+            st.text(report)
+        st.download_button("Download timings (JSON)", profiler.to_json(), file_name="timings.json", key='download_timings_json')
+        st.download_button("Download timings (Prometheus)", profiler.to_prometheus(), file_name="timings.prom", key='download_timings_prom')
+
+def debug_sidebar():
+    with st.sidebar:
+        st.checkbox("Show performance debug panel", key='show_debug_panel')
+        st.selectbox("Profiler capture", ('off',) + available_capture_modes(), key='profile_capture')
+        st.checkbox("Synthetic browser camera (testing)", key='synthetic_camera',
+                    help="Feeds a generated squat video through the browser-camera path instead of WebRTC.")
+
+def post_exercise_analysis(joint_angle_data, people=None):
+    if people is not None:
+        # Multi-person set: one summary per tracked person (skipping anyone only seen briefly)
+        summaries = [session for _, session in sorted(people.items()) if len(session.joint_angle_data) >= 30]
+        if not summaries:
+            st.write("No one was tracked long enough to summarize.")
+        for session in summaries:
+            st.write(f"### Person {session.track_id}")
+            if session.strategy.rep_count is not None:
+                st.write(f"Reps completed: {session.strategy.rep_count}")
+            plot_joint_summary(session.joint_angle_data)
+            all_feedback = session.feedback_manager.get_all_feedback()
+            st.write(all_feedback if all_feedback else "No form issues detected.")
     else:
-        st.write("No form issues detected.")
+        # Plot joint angles over time
+        st.write("### Joint Angles Over Time")
+        plot_joint_summary(joint_angle_data)
+
+        # Show accumulated feedback at the end
+        st.write("### Summary of All Form Feedback")
+        all_feedback = st.session_state['feedback_manager'].get_all_feedback()
+        if all_feedback:
+            st.write(all_feedback)
+        else:
+            st.write("No form issues detected.")
 
     # After exercise, return to chat for the next exercise
     col1, col2 = st.columns(2)
@@ -319,6 +652,7 @@ def start_workout():
 # Main function to run the app
 def main():
     initialize_session_state()
+    debug_sidebar()
     start_workout()
 
     if st.session_state['workout_started']:
@@ -3,7 +3,7 @@ import cv2
 import random
 from utils.model_utils import get_model, get_keypoints_from_frame
 from utils.angle_utils import calculate_joint_angles
-from utils.video_utils import save_video, plot_joint_angles
+from utils.video_utils import spool_upload, plot_joint_angles
 from utils.exercise_rules import check_exercise_form, get_exercise_strategy
 from utils.feedback_utils import FeedbackManager
 from utils.chat_utils import get_ai_recommendation
@@ -11,7 +11,7 @@ from utils.chat_utils import get_ai_recommendation
 # List of available exercises (strategies)
 available_exercises = ['Pull-up', 'Squat', 'Bench Press', 'Easy Exercise']
 
-# Load YOLO model
+# Shared YOLO model (loaded and warmed up once per process, reused across reruns and sessions)
 model = get_model()
 
 # Initialize session state variables if not already initialized
@@ -115,8 +115,13 @@ def video_analysis():
     uploaded_video = st.file_uploader("Upload a video for analysis", type=["mp4", "avi", "mov"], key='video_uploader')
 
     if uploaded_video is not None:
-        # Save uploaded video
-        video_path = save_video(uploaded_video)
+        # Stream the upload to this session's own temporary file (deleted when the analysis ends)
+        try:
+            upload = spool_upload(uploaded_video)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        video_path = upload.path
 
         cap = cv2.VideoCapture(video_path)
         stframe = st.empty()
@@ -202,6 +207,8 @@ def video_analysis():
             st.write(f"An error occurred during video processing: {e}")
             cap.release()
             cv2.destroyAllWindows()
+        finally:
+            upload.cleanup()
 
 # Main function to run the app
 def main():
@@ -0,0 +1,86 @@
+"""
+End-to-end throughput of the offline video analysis pipeline compared with the
+original one-frame-at-a-time loop.
+
+    python benchmarks/bench_video_pipeline.py path/to/video.mp4 --batch-size 8 --target-fps 10
+    python benchmarks/bench_video_pipeline.py path/to/video.mp4 --workers 16 --skip-sequential
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_utils import get_model, get_keypoints_from_frame  # noqa: E402
+from utils.overlay_renderer import OverlayRenderer  # noqa: E402
+from utils.parallel_analysis import analyze_video_parallel  # noqa: E402
+from utils.video_pipeline import analyze_video  # noqa: E402
+
+
+def run_sequential(video_path, model, max_frames=None):
+    """The original process_video loop: decode, infer and plot every frame."""
+    cap = cv2.VideoCapture(video_path)
+    frames = 0
+    start = time.perf_counter()
+    while cap.isOpened():
+        ret, frame = cap.read()
+        if not ret or (max_frames and frames >= max_frames):
+            break
+        _, results = get_keypoints_from_frame(frame, model)
+        if results is not None and len(results) > 0:
+            results[0].plot()
+        frames += 1
+    cap.release()
+    return frames, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('video')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--target-fps', type=float, default=10)
+    parser.add_argument('--preview-every', type=int, default=5)
+    parser.add_argument('--skip-sequential', action='store_true',
+                        help="Don't run the per-frame baseline (it is slow on long videos)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Also run the multi-process segment analysis with this many workers")
+    args = parser.parse_args()
+
+    model = get_model()
+    renderer = OverlayRenderer(max_fps=None)
+
+    analysis = analyze_video(args.video, model, batch_size=args.batch_size, target_fps=args.target_fps,
+                             preview_every=args.preview_every,
+                             on_preview=lambda frame, result: renderer.render(frame, list(result.keypoints)))
+    stats = analysis['stats']
+    video_seconds = (analysis['frame_indices'][-1] + 1) / analysis['fps'] if len(analysis['frame_indices']) else 0.0
+
+    print(f"Video: {args.video} ({video_seconds:.1f}s @ {analysis['fps']:.1f} fps)")
+    print(f"Batched pipeline: {stats['frames_analysed']} frames (stride {analysis['stride']}, "
+          f"batch {args.batch_size}) in {stats['elapsed_seconds']:.2f}s "
+          f"-> {stats['analysed_fps']:.1f} frames/s, {stats['video_seconds_per_second']:.2f} video s/s, "
+          f"inference {stats['inference_seconds']:.2f}s")
+
+    if args.workers:
+        parallel = analyze_video_parallel(args.video, workers=args.workers, batch_size=args.batch_size,
+                                          target_fps=args.target_fps)
+        parallel_stats = parallel['stats']
+        print(f"Parallel ({args.workers} workers, {parallel_stats['segments']} segments): "
+              f"{parallel_stats['frames_analysed']} frames in {parallel_stats['elapsed_seconds']:.2f}s "
+              f"-> {parallel_stats['analysed_fps']:.1f} frames/s, "
+              f"{parallel_stats['video_seconds_per_second']:.2f} video s/s "
+              f"({stats['elapsed_seconds'] / parallel_stats['elapsed_seconds']:.1f}x the batched pipeline)")
+
+    if not args.skip_sequential:
+        frames, elapsed = run_sequential(args.video, model)
+        print(f"Sequential loop:  {frames} frames in {elapsed:.2f}s -> {frames / elapsed:.1f} frames/s")
+        if stats['elapsed_seconds'] > 0:
+            print(f"Speedup (wall clock, whole video): {elapsed / stats['elapsed_seconds']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
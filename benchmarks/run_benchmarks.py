@@ -0,0 +1,293 @@
+"""
+Benchmark suite for the pose -> angles -> rules pipeline. Runs without a camera or network.
+
+    python benchmarks/run_benchmarks.py                          # print results
+    python benchmarks/run_benchmarks.py --output results.json    # save machine-readable results
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json   # fail on regressions
+    python benchmarks/run_benchmarks.py --with-model             # also time YOLO on a synthetic video
+
+Benchmarks needing the pose model (get_keypoints_from_frame and the end-to-end loop with
+inference) only run with --with-model, since they download/load weights.
+"""
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_keypoint_stream, write_synthetic_video  # noqa: E402
+from strategies.exercise_strategy import ExerciseStrategy  # noqa: E402
+from utils.angle_utils import (  # noqa: E402
+    calculate_joint_angles, calculate_joint_distances,
+    calculate_joint_angles_batch, calculate_joint_distances_batch,
+    values_to_dict, ANGLE_NAMES, DISTANCE_NAMES,
+)
+from utils.feedback_utils import FeedbackManager  # noqa: E402
+from utils.inference_scheduler import InferenceScheduler  # noqa: E402
+from utils.keypoint_filter import KeypointFilter  # noqa: E402
+
+
+def measure(function, repeat=5, min_time=0.2):
+    """
+    Times `function` the way timeit does: calls it in a loop until a run takes at least
+    min_time seconds, repeats that `repeat` times and reports per-call times in microseconds.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= min_time or number >= 1_000_000:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        timings.append((time.perf_counter() - start) / number * 1e6)
+    return {'median_us': float(np.median(timings)), 'min_us': float(min(timings)), 'calls_per_run': number}
+
+
+def load_strategies():
+    """Instantiates every ExerciseStrategy subclass defined in strategies/*_strategy.py."""
+    strategies = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, 'strategies', '*_strategy.py'))):
+        module = importlib.import_module(f"strategies.{os.path.splitext(os.path.basename(path))[0]}")
+        for value in vars(module).values():
+            if (isinstance(value, type) and issubclass(value, ExerciseStrategy)
+                    and value is not ExerciseStrategy and value.__module__ == module.__name__):
+                try:
+                    strategies[value.__name__] = value()
+                except TypeError:
+                    continue  # Abstract helpers
+    return strategies
+
+
+def check_parity(keypoints):
+    """
+    Checks that the batch angle/distance functions agree with the per-frame ones, on the synthetic
+    stream and on frames with non-finite or missing keypoints. Returns a list of mismatch descriptions.
+    """
+    frames = [np.asarray(frame) for frame in keypoints[:100]]
+    edge_case = np.array(keypoints[0], dtype=np.float32)
+    for value in (np.nan, np.inf):
+        frame = edge_case.copy()
+        frame[0, :2] = value  # Nose: used by no angle or distance
+        frames.append(frame)
+    frame = edge_case.copy()
+    frame[5] = 0  # Left shoulder missing
+    frames.append(frame)
+
+    mismatches = []
+    angle_batch = calculate_joint_angles_batch(np.stack(frames))
+    distance_batch = calculate_joint_distances_batch(np.stack(frames))
+    for index, frame in enumerate(frames):
+        for kind, batch_row, single, names in (
+                ('angles', angle_batch[index], calculate_joint_angles(frame), ANGLE_NAMES),
+                ('distances', distance_batch[index], calculate_joint_distances(frame), DISTANCE_NAMES)):
+            batched = values_to_dict(batch_row, names)
+            if batched.keys() != single.keys() or not all(np.isclose(batched[name], single[name], rtol=1e-4)
+                                                          for name in batched):
+                mismatches.append(f"frame {index} {kind}: batch {batched} != per-frame {single}")
+    return mismatches
+
+
+def run_core_benchmarks(num_frames, repeat):
+    keypoints = generate_keypoint_stream(num_frames)
+    frame_lists = list(keypoints)  # Per-frame (K, 3) arrays, as get_keypoints_from_frame returns them
+    single_frame = frame_lists[len(frame_lists) // 2]
+    angles = calculate_joint_angles(single_frame)
+    distances = calculate_joint_distances(single_frame)
+
+    results = {
+        'calculate_joint_angles[frame]': measure(lambda: calculate_joint_angles(single_frame), repeat),
+        'calculate_joint_distances[frame]': measure(lambda: calculate_joint_distances(single_frame), repeat),
+        f'calculate_joint_angles_batch[{num_frames} frames]': measure(lambda: calculate_joint_angles_batch(keypoints), repeat),
+        f'calculate_joint_distances_batch[{num_frames} frames]': measure(lambda: calculate_joint_distances_batch(keypoints), repeat),
+    }
+
+    strategies = load_strategies()
+    for name, strategy in strategies.items():
+        results[f'{name}.check_form'] = measure(lambda: strategy.check_form(angles, distances), repeat)
+
+    # Rule-based strategies can also check a whole clip in one pass
+    angle_batch = calculate_joint_angles_batch(keypoints)
+    distance_batch = calculate_joint_distances_batch(keypoints)
+    for name, strategy in strategies.items():
+        if hasattr(strategy, 'check_form_batch'):
+            results[f'{name}.check_form_batch[{num_frames} frames]'] = measure(
+                lambda: strategy.check_form_batch(angle_batch, distance_batch), repeat)
+
+    # Rep/phase tracking runs on every frame
+    squat = strategies['SquatStrategy']
+    frame_clock = [0]
+
+    def observe():
+        frame_clock[0] += 1
+        squat.observe(angle_batch[frame_clock[0] % num_frames], frame_clock[0] / 30)
+    results['SquatStrategy.observe'] = measure(observe, repeat)
+
+    keypoint_filter = KeypointFilter()
+
+    def filter_frame():
+        frame_clock[0] += 1
+        keypoint_filter.update(frame_lists[frame_clock[0] % num_frames], frame_clock[0] / 30)
+    results['KeypointFilter.update'] = measure(filter_frame, repeat)
+
+    # The live scheduler looks at every camera frame, inferred or not
+    scheduler = InferenceScheduler()
+    camera_frames = np.random.default_rng(0).integers(0, 256, (2, 480, 640, 3), dtype=np.uint8)
+
+    def schedule_frame():
+        frame_clock[0] += 1
+        scheduler.observe(camera_frames[frame_clock[0] % 2])
+        scheduler.should_infer(frame_clock[0] / 30)
+    results['InferenceScheduler.observe[640x480]'] = measure(schedule_frame, repeat)
+
+    violations = ["Keep your back straight during the squat.", "Left knee not detected."]
+    manager = FeedbackManager()
+    clock = [0.0]
+
+    def update_feedback():
+        clock[0] += 0.5  # Past the cooldown every few calls, so both paths are exercised
+        manager.update_feedback(violations, current_time=clock[0])
+    results['FeedbackManager.update_feedback'] = measure(update_feedback, repeat)
+
+    # The per-frame analysis loop without inference, over a whole synthetic clip
+    strategy = strategies.get('SquatStrategy') or next(iter(strategies.values()))
+
+    def frame_loop():
+        manager = FeedbackManager()
+        for index, frame in enumerate(frame_lists):
+            frame_angles = calculate_joint_angles(frame)
+            frame_distances = calculate_joint_distances(frame)
+            if index % 15 == 0:
+                manager.update_feedback(strategy.check_form(frame_angles, frame_distances), current_time=index / 30)
+    results[f'frame_loop[{num_frames} frames, no model]'] = measure(frame_loop, max(1, repeat // 2), min_time=0)
+    return results
+
+
+def run_model_benchmarks(repeat):
+    import cv2
+    from utils.model_utils import get_model, get_keypoints_from_frame
+
+    model = get_model()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        video_path = write_synthetic_video(os.path.join(directory, 'sample.mp4'), num_frames=60)
+        cap = cv2.VideoCapture(video_path)
+        frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+
+    frame = frames[len(frames) // 2]
+    results['get_keypoints_from_frame'] = measure(lambda: get_keypoints_from_frame(frame, model), repeat, min_time=0)
+
+    manager = FeedbackManager()
+    strategy = load_strategies()['SquatStrategy']
+
+    def end_to_end():
+        for index, frame in enumerate(frames):
+            keypoints, _ = get_keypoints_from_frame(frame, model)
+            if keypoints is None:
+                continue
+            violations = strategy.check_form(calculate_joint_angles(keypoints), calculate_joint_distances(keypoints))
+            manager.update_feedback(violations, current_time=index / 30)
+    results[f'end_to_end[{len(frames)} frames]'] = measure(end_to_end, 1, min_time=0)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_us=1.0):
+    """
+    Returns a list of (name, baseline_us, current_us, ratio) for benchmarks slower than threshold.
+    Best-of-runs times are compared, as they are the least sensitive to noise from other processes.
+    Slowdowns under min_delta_us per call are ignored: on sub-microsecond benchmarks a relative
+    threshold alone flags timer and cache noise.
+    """
+    regressions = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        ratio = current['min_us'] / previous['min_us']
+        if ratio > 1 + threshold and current['min_us'] - previous['min_us'] >= min_delta_us:
+            regressions.append((name, previous['min_us'], current['min_us'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the pose -> angles -> rules pipeline.")
+    parser.add_argument('--frames', type=int, default=900, help="Length of the synthetic keypoint stream")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--with-model', action='store_true', help="Also benchmark pose inference")
+    parser.add_argument('--output', help="Write results as JSON to this path")
+    parser.add_argument('--compare', metavar='BASELINE', help="Compare against a stored baseline JSON")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown vs the baseline before failing (0.25 = 25%%)")
+    parser.add_argument('--min-delta-us', type=float, default=1.0,
+                        help="Ignore slowdowns smaller than this many microseconds per call")
+    args = parser.parse_args()
+
+    # Fast but wrong isn't an improvement: the batch paths must match the per-frame ones
+    mismatches = check_parity(generate_keypoint_stream(args.frames))
+    if mismatches:
+        print("Batch results differ from per-frame results:")
+        for mismatch in mismatches:
+            print(f"  {mismatch}")
+        sys.exit(1)
+
+    results = run_core_benchmarks(args.frames, args.repeat)
+    if args.with_model:
+        results.update(run_model_benchmarks(args.repeat))
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'frames': args.frames,
+        },
+        'results': results,
+    }
+
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        print(f"{name:<{width}}  {result['median_us']:>12.2f} us  (min {result['min_us']:.2f})")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold, args.min_delta_us)
+        if regressions:
+            print("Regressions:")
+            for name, previous, current, ratio in regressions:
+                print(f"  {name}: {previous:.2f} us -> {current:.2f} us ({ratio:.2f}x)")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
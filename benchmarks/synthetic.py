@@ -0,0 +1,62 @@
+"""
+Synthetic inputs for the benchmarks: keypoint streams of a person doing squat-like reps,
+and a short stick-figure video rendered from them. Everything is seeded so runs are
+reproducible and nothing needs a camera or network access.
+"""
+
+import numpy as np
+
+from utils.angle_utils import NUM_KEYPOINTS
+
+# Standing pose in a 640x480 frame (COCO order: nose, eyes, ears, shoulders, elbows, wrists, hips, knees, ankles)
+_STANDING_POSE = np.array([
+    [320, 80], [312, 72], [328, 72], [302, 78], [338, 78],
+    [290, 130], [350, 130], [280, 190], [360, 190], [275, 245], [365, 245],
+    [300, 250], [340, 250], [298, 340], [342, 340], [296, 430], [344, 430],
+], dtype=np.float32)
+
+
+def generate_keypoint_stream(num_frames=900, fps=30.0, rep_seconds=3.0, noise=1.5,
+                             dropout_rate=0.02, seed=0):
+    """
+    Returns an (N, 17, 3) float32 array of (x, y, confidence) for a person squatting:
+    hips and knees move down and forward once per rep, with pixel noise and random keypoint
+    dropouts (zeroed, as the model reports missing keypoints).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(num_frames, dtype=np.float32) / fps
+    depth = 0.5 * (1 - np.cos(2 * np.pi * t / rep_seconds))  # 0 standing .. 1 bottom of the squat
+
+    keypoints = np.empty((num_frames, NUM_KEYPOINTS, 3), dtype=np.float32)
+    keypoints[:, :, :2] = _STANDING_POSE
+    # Upper body and hips drop, knees travel forward
+    keypoints[:, :13, 1] += depth[:, None] * 90
+    keypoints[:, 13:15, 0] += (depth[:, None] * 40) * np.array([-1, 1], dtype=np.float32)
+    keypoints[:, 13:15, 1] += depth[:, None] * 30
+    keypoints[:, :, :2] += rng.normal(0, noise, size=(num_frames, NUM_KEYPOINTS, 2))
+    keypoints[:, :, 2] = rng.uniform(0.6, 1.0, size=(num_frames, NUM_KEYPOINTS))
+
+    dropped = rng.random((num_frames, NUM_KEYPOINTS)) < dropout_rate
+    keypoints[dropped] = 0
+    return keypoints
+
+
+def write_synthetic_video(path, num_frames=90, fps=30.0, size=(640, 480), seed=0):
+    """Renders a stick-figure video of the synthetic stream to `path` and returns the path."""
+    import cv2
+
+    skeleton = ((5, 6), (5, 7), (7, 9), (6, 8), (8, 10), (5, 11), (6, 12), (11, 12),
+                (11, 13), (13, 15), (12, 14), (14, 16))
+    keypoints = generate_keypoint_stream(num_frames, fps, dropout_rate=0.0, seed=seed)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    try:
+        for frame_keypoints in keypoints:
+            frame = np.full((size[1], size[0], 3), 200, dtype=np.uint8)
+            for start, end in skeleton:
+                cv2.line(frame, tuple(int(v) for v in frame_keypoints[start, :2]),
+                         tuple(int(v) for v in frame_keypoints[end, :2]), (40, 40, 40), 12)
+            cv2.circle(frame, tuple(int(v) for v in frame_keypoints[0, :2]), 28, (40, 40, 40), -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
@@ -1,28 +1,17 @@
-from strategies.exercise_strategy import ExerciseStrategy
+from strategies.rule_engine import Rule, RuleBasedStrategy
+from utils.rep_counter import FLEXED
 
-class BenchPressStrategy(ExerciseStrategy):
+class BenchPressStrategy(RuleBasedStrategy):
     """
-    Strategy for analyzing bench press.
+    Strategy for analyzing bench press, based on elbow and shoulder positions.
     """
-
-    def check_form(self, joint_angles, joint_distances):
-        """
-        Checks the bench press form based on elbow, shoulder, and wrist positions.
-        """
-        feedback = []
-
-        # Ensure elbows are at the proper angle (between 70 and 90 degrees)
-        if 'Right Elbow' in joint_angles and (joint_angles['Right Elbow'] < 70 or joint_angles['Right Elbow'] > 90):
-            feedback.append("Keep your right elbow between 70 and 90 degrees for proper form.")
-
-        if 'Left Elbow' in joint_angles and (joint_angles['Left Elbow'] < 70 or joint_angles['Left Elbow'] > 90):
-            feedback.append("Keep your left elbow between 70 and 90 degrees for proper form.")
+    rep_joints = ('Right Elbow', 'Left Elbow')
+    rules = (
+        # Ensure elbows are at the proper angle (between 70 and 90 degrees) at the bottom of the press
+        Rule('Right Elbow', 'outside', 80, 10, phase=FLEXED, message="Keep your right elbow between 70 and 90 degrees for proper form."),
+        Rule('Left Elbow', 'outside', 80, 10, phase=FLEXED, message="Keep your left elbow between 70 and 90 degrees for proper form."),
 
         # Check shoulder engagement
-        if 'Right Shoulder Flexion' in joint_angles and joint_angles['Right Shoulder Flexion'] < 45:
-            feedback.append("Ensure proper shoulder engagement on the right side.")
-
-        if 'Left Shoulder Flexion' in joint_angles and joint_angles['Left Shoulder Flexion'] < 45:
-            feedback.append("Ensure proper shoulder engagement on the left side.")
-
-        return feedback
+        Rule('Right Shoulder Flexion', 'below', 45, message="Ensure proper shoulder engagement on the right side."),
+        Rule('Left Shoulder Flexion', 'below', 45, message="Ensure proper shoulder engagement on the left side."),
+    )
@@ -6,7 +6,17 @@ class ExerciseStrategy(ABC):
     Every exercise should implement this class and its methods.
     """
 
+    rep_count = None  # Strategies that count reps replace this with the number completed
+
     @abstractmethod
     def check_form(self, joint_angles):
         """Check the form for the exercise based on joint angles."""
-        pass
\ No newline at end of file
+        pass
+
+    def observe(self, angle_row, timestamp):
+        """Called with every frame's angle row, for strategies that track movement over time."""
+        return None
+
+    def reset(self):
+        """Clear any per-session state (e.g. rep counters) before a new set. Stateless strategies keep this no-op."""
+        pass
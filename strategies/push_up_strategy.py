@@ -1,40 +1,19 @@
-from strategies.exercise_strategy import ExerciseStrategy
+from strategies.rule_engine import Rule, RuleBasedStrategy
+from utils.rep_counter import FLEXED
 
-class PushUpStrategy(ExerciseStrategy):
-    def check_form(self, joint_angles, joint_distances):
-        """
-        Checks form during push-ups.
-        """
-        feedback = []
-        buffers = {
-            'elbow_angle': 10,  # degrees
-            'spine_angle': 5    # degrees
-        }
+class PushUpStrategy(RuleBasedStrategy):
+    """
+    Checks form during push-ups. Elbow depth is judged at the bottom of each rep.
+    """
+    rep_joints = ('Right Elbow', 'Left Elbow')
+    rules = (
+        # Elbow angle should be around 90 degrees at the bottom (10 degree buffer)
+        Rule('Right Elbow', 'outside', 90, 10, phase=FLEXED, message="Try to bend your right elbow to about 90 degrees at the bottom of the push-up."),
+        Rule('Right Elbow', 'missing', message="Right elbow not detected."),
+        Rule('Left Elbow', 'outside', 90, 10, phase=FLEXED, message="Try to bend your left elbow to about 90 degrees at the bottom of the push-up."),
+        Rule('Left Elbow', 'missing', message="Left elbow not detected."),
 
-        # Elbow angle should be around 90 degrees at the bottom
-        right_elbow_angle = joint_angles.get('Right Elbow')
-        left_elbow_angle = joint_angles.get('Left Elbow')
-        target_elbow_angle = 90
-
-        if right_elbow_angle:
-            if abs(right_elbow_angle - target_elbow_angle) > buffers['elbow_angle']:
-                feedback.append("Try to bend your right elbow to about 90 degrees at the bottom of the push-up.")
-        else:
-            feedback.append("Right elbow not detected.")
-
-        if left_elbow_angle:
-            if abs(left_elbow_angle - target_elbow_angle) > buffers['elbow_angle']:
-                feedback.append("Try to bend your left elbow to about 90 degrees at the bottom of the push-up.")
-        else:
-            feedback.append("Left elbow not detected.")
-
-        # Spine angle should remain relatively straight
-        spine_angle = joint_angles.get('Spine Angle')
-        target_spine_angle = 180  # Straight line
-        if spine_angle:
-            if abs(spine_angle - target_spine_angle) > buffers['spine_angle']:
-                feedback.append("Keep your back straight during the push-up.")
-        else:
-            feedback.append("Spine angle not detected.")
-
-        return feedback
+        # Spine angle should remain relatively straight (180 = straight line)
+        Rule('Spine Angle', 'outside', 180, 5, message="Keep your back straight during the push-up."),
+        Rule('Spine Angle', 'missing', message="Spine angle not detected."),
+    )
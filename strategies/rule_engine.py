@@ -0,0 +1,257 @@
+# rule_engine.py
+
+import numpy as np
+
+from strategies.exercise_strategy import ExerciseStrategy
+from utils.angle_utils import ANGLE_INDEX, ANGLE_NAMES, DISTANCE_NAMES
+from utils.rep_counter import PHASES, RepPhaseDetector, mean_angle
+
+# Columns a rule can refer to: the joint angles followed by the joint distances
+RULE_COLUMNS = tuple(ANGLE_NAMES) + tuple(DISTANCE_NAMES)
+_COLUMN_INDEX = {name: i for i, name in enumerate(RULE_COLUMNS)}
+_ANGLE_COLUMNS = frozenset(ANGLE_NAMES)
+
+RULE_KINDS = ('outside', 'above', 'below', 'missing')
+
+
+class Rule:
+    """
+    One declarative form check on a joint angle (or distance).
+
+    kind:
+        'outside'  fires when |value - target| > tolerance
+        'above'    fires when value > target + tolerance
+        'below'    fires when value < target - tolerance
+        'missing'  fires when the joint was not detected (target/tolerance unused)
+    Value rules never fire on a joint that was not detected.
+    phase:    only evaluate the rule in this movement phase (None = always)
+    priority: higher priority messages are listed first; ties keep the declaration order
+    """
+
+    def __init__(self, joint, kind, target=0.0, tolerance=0.0, message=None, phase=None, priority=0):
+        if joint not in _COLUMN_INDEX:
+            raise ValueError(f"Unknown joint {joint!r}; expected one of {RULE_COLUMNS}")
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unknown rule kind {kind!r}; expected one of {RULE_KINDS}")
+        if not message:
+            raise ValueError("A rule needs a feedback message")
+        self.joint = joint
+        self.kind = kind
+        self.target = float(target)
+        self.tolerance = float(tolerance)
+        self.message = message
+        self.phase = phase
+        self.priority = priority
+
+    def bounds(self):
+        """The (lower, upper) range of values that do NOT trigger this rule."""
+        if self.kind == 'outside':
+            return self.target - self.tolerance, self.target + self.tolerance
+        if self.kind == 'above':
+            return -np.inf, self.target + self.tolerance
+        if self.kind == 'below':
+            return self.target - self.tolerance, np.inf
+        return -np.inf, np.inf
+
+    def __repr__(self):
+        return f"Rule({self.joint!r}, {self.kind!r}, {self.target:g}, {self.tolerance:g}, message={self.message!r})"
+
+
+class CompiledRules:
+    """
+    A rule list compiled into flat arrays, so every rule is checked for every frame in a few
+    vectorized NumPy operations over an (N, C) array of RULE_COLUMNS values (NaN = not detected).
+
+    Single frames given as dicts (the live loop) go through check_dicts() instead: a flat tuple
+    of pre-computed bounds, which is cheaper than building an array for a handful of rules.
+    """
+
+    def __init__(self, rules, phases=()):
+        # Evaluate (and report) in priority order; sorted() is stable, so ties keep declaration order
+        self.rules = tuple(sorted(rules, key=lambda rule: -rule.priority))
+        self.messages = tuple(rule.message for rule in self.rules)
+        self.columns = np.array([_COLUMN_INDEX[rule.joint] for rule in self.rules], dtype=np.intp)
+        bounds = np.array([rule.bounds() for rule in self.rules], dtype=np.float32).reshape(-1, 2)
+        self.lower = bounds[:, 0]
+        self.upper = bounds[:, 1]
+        self.missing = np.array([rule.kind == 'missing' for rule in self.rules], dtype=bool)
+        # Phase of each rule as an index into `phases` (-1 = every phase)
+        self.phases = tuple(phases)
+        phase_index = {phase: i for i, phase in enumerate(self.phases)}
+        for rule in self.rules:
+            if rule.phase is not None and rule.phase not in phase_index:
+                raise ValueError(f"Rule phase {rule.phase!r} is not one of {self.phases}")
+        self.rule_phases = np.array([phase_index.get(rule.phase, -1) for rule in self.rules], dtype=np.intp)
+        # Per phase, the (joint, is angle, lower, upper, is missing rule, message) checks active in it
+        checks = [(rule.joint, rule.joint in _ANGLE_COLUMNS, float(low), float(high), rule.kind == 'missing', rule.message)
+                  for rule, (low, high) in zip(self.rules, bounds)]
+        self._phase_checks = {
+            phase: tuple(check for rule, check in zip(self.rules, checks) if rule.phase is None or rule.phase == phase)
+            for phase in (None,) + self.phases
+        }
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, values, phases=None):
+        """
+        values: (N, C) or (C,) array in RULE_COLUMNS order.
+        phases: optional (N,) phase indices (or one index) for phase-specific rules; without it,
+                phase-specific rules are skipped.
+        Returns an (N, R) (or (R,)) boolean array of fired rules, in self.rules order.
+        """
+        values = np.asarray(values, dtype=np.float32)
+        selected = values[..., self.columns]
+        with np.errstate(invalid='ignore'):
+            out_of_bounds = (selected < self.lower) | (selected > self.upper)
+        fired = np.where(self.missing, np.isnan(selected), out_of_bounds)
+        if phases is None:
+            return fired & (self.rule_phases < 0)
+        phases = np.asarray(phases, dtype=np.intp)
+        active = (self.rule_phases < 0) | (self.rule_phases == phases[..., None])
+        return fired & active
+
+    def check_dicts(self, joint_angles, joint_distances=None, phase=None):
+        """Evaluates one frame given {name: value} dicts (absent/None/NaN = not detected)."""
+        checks = self._phase_checks.get(phase) or self._phase_checks[None]
+        feedback = []
+        for joint, is_angle, low, high, missing, message in checks:
+            value = joint_angles.get(joint) if is_angle else (joint_distances or {}).get(joint)
+            if value is None or value != value:  # value != value: NaN
+                if missing:
+                    feedback.append(message)
+            elif not missing and (value < low or value > high):
+                feedback.append(message)
+        return feedback
+
+    def check_phase(self, values, phase):
+        """Messages of the rules specific to `phase` that fire on one RULE_COLUMNS row."""
+        phase_index = self.phases.index(phase)
+        fired = self.evaluate(values, phase_index) & (self.rule_phases == phase_index)
+        return self.messages_for(fired)
+
+    def messages_for(self, fired):
+        """Turns evaluate() output into feedback messages: a list for one frame, a list of lists for (N, R)."""
+        fired = np.asarray(fired)
+        if fired.ndim == 1:
+            return [message for message, hit in zip(self.messages, fired.tolist()) if hit]
+        # tolist() once, then plain Python: much cheaper than indexing the array per frame
+        return [[message for message, hit in zip(self.messages, row) if hit] for row in fired.tolist()]
+
+
+def values_from_arrays(angles, distances=None):
+    """Joins (N, len(ANGLE_NAMES)) angles and (N, len(DISTANCE_NAMES)) distances into RULE_COLUMNS order."""
+    angles = np.asarray(angles, dtype=np.float32)
+    if distances is None:
+        distances = np.full(angles.shape[:-1] + (len(DISTANCE_NAMES),), np.nan, dtype=np.float32)
+    return np.concatenate((angles, np.asarray(distances, dtype=np.float32)), axis=-1)
+
+
+class RuleBasedStrategy(ExerciseStrategy):
+    """
+    An exercise defined entirely by data: subclasses only list their `rules`.
+    The rules are compiled once per class, on first use.
+
+    If `rep_joints` is set, observe() feeds the mean of those angles to a RepPhaseDetector on every
+    frame. Rules with a phase are then judged once per rep, on the frame where that turning point
+    peaked (e.g. the bottom of a squat), instead of on every frame. Their messages are reported by
+    check_form() until the same turning point is judged again, or `turn_feedback_seconds` pass.
+    """
+
+    rules = ()
+    phases = PHASES
+    rep_joints = ()
+    detector_settings = {}
+    turn_feedback_seconds = 6.0
+
+    def __init__(self):
+        self.reset()
+
+    @classmethod
+    def compiled(cls):
+        # Looked up in the class's own __dict__ so subclasses never reuse a parent's compiled rules
+        compiled = cls.__dict__.get('_compiled')
+        if compiled is None:
+            compiled = CompiledRules(cls.rules, cls.phases)
+            cls._compiled = compiled
+        return compiled
+
+    def reset(self):
+        self.detector = RepPhaseDetector(**self.detector_settings) if self.rep_joints else None
+        self._rep_indices = tuple(ANGLE_INDEX[name] for name in self.rep_joints)
+        self._turn_feedback = {}  # phase -> (messages, timestamp of the turning point)
+        self._last_time = None
+
+    @property
+    def phase(self):
+        return self.detector.phase if self.detector is not None else None
+
+    @property
+    def rep_count(self):
+        return self.detector.rep_count if self.detector is not None else None
+
+    def observe(self, angle_row, timestamp):
+        """
+        Feeds one frame's angle row (ANGLE_NAMES order, NaN = not detected) to the rep detector.
+        Cheap enough for every frame. Returns the current phase (None without rep_joints).
+        """
+        if self.detector is None:
+            return None
+        self._last_time = timestamp
+        phase = self.detector.update(mean_angle(angle_row, self._rep_indices), timestamp, angle_row)
+        turn = self.detector.turn
+        if turn is not None:
+            turn_phase, _, turn_values, turn_time = turn
+            compiled = self.compiled()
+            messages = compiled.check_phase(values_from_arrays(turn_values), turn_phase) if turn_values is not None else []
+            self._turn_feedback[turn_phase] = (messages, turn_time)
+        return phase
+
+    def _turn_messages(self):
+        messages = []
+        for turn_messages, turn_time in self._turn_feedback.values():
+            if self._last_time is None or self._last_time - turn_time <= self.turn_feedback_seconds:
+                messages.extend(turn_messages)
+        return messages
+
+    def check_form(self, joint_angles, joint_distances=None, phase=None):
+        """
+        Checks one frame given the {name: value} dicts. Returns the list of feedback messages.
+        Without an explicit phase, phase-specific rules come from the last judged turning points.
+        """
+        feedback = self.compiled().check_dicts(joint_angles, joint_distances, phase)
+        if phase is None and self._turn_feedback:
+            feedback.extend(message for message in self._turn_messages() if message not in feedback)
+        return feedback
+
+    def check_form_batch(self, angles, distances=None, phases=None):
+        """
+        Checks N frames at once given (N, len(ANGLE_NAMES)) angles and optional distances.
+        Returns one list of feedback messages per frame.
+        """
+        compiled = self.compiled()
+        fired = compiled.evaluate(values_from_arrays(angles, distances), phases)
+        return compiled.messages_for(fired)
+
+    def check_form_series(self, angles, distances, timestamps, rows):
+        """
+        Offline version of calling observe() on every frame and check_form() on `rows`:
+        the always-on rules for all requested rows are checked in one batch.
+        Returns one list of feedback messages per requested row.
+        """
+        rows = list(rows)
+        per_row = self.check_form_batch(angles[rows], None if distances is None else distances[rows])
+        if self.detector is None:
+            return per_row
+        feedback = []
+        next_frame = 0
+        for messages, row in zip(per_row, rows):
+            for frame in range(next_frame, row + 1):
+                self.observe(angles[frame], timestamps[frame])
+            next_frame = row + 1
+            messages.extend(message for message in self._turn_messages() if message not in messages)
+            feedback.append(messages)
+        # The rest of the clip still counts towards the reps
+        for frame in range(next_frame, len(angles)):
+            self.observe(angles[frame], timestamps[frame])
+        return feedback
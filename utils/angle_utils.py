@@ -1,5 +1,47 @@
+import math
+
 import numpy as np
 
+# Joint angle table: (name, point1, vertex, point3) using COCO keypoint indices.
+# The angle is measured at the vertex keypoint.
+JOINT_TRIPLETS = (
+    ('Right Elbow', 6, 8, 10),             # shoulder, elbow, wrist
+    ('Left Elbow', 5, 7, 9),               # shoulder, elbow, wrist
+    ('Right Knee', 12, 14, 16),            # hip, knee, ankle
+    ('Left Knee', 11, 13, 15),             # hip, knee, ankle
+    ('Right Hip', 6, 12, 14),              # shoulder, hip, knee
+    ('Left Hip', 5, 11, 13),               # shoulder, hip, knee
+    ('Right Shoulder Flexion', 12, 6, 8),  # hip, shoulder, elbow
+    ('Left Shoulder Flexion', 11, 5, 7),   # hip, shoulder, elbow
+    ('Spine Angle', 6, 12, 5),             # right shoulder, pelvis, left shoulder
+)
+
+# Distance table: (name, (indices averaged for end A), (indices averaged for end B)).
+JOINT_DISTANCE_PAIRS = (
+    ('Shoulder Width', (5,), (6,)),
+    ('Hip Width', (11,), (12,)),
+    ('Spine Length', (5, 6), (11, 12)),  # shoulder midpoint to pelvis midpoint
+)
+
+ANGLE_NAMES = tuple(name for name, _, _, _ in JOINT_TRIPLETS)
+DISTANCE_NAMES = tuple(name for name, _, _ in JOINT_DISTANCE_PAIRS)
+ANGLE_INDEX = {name: i for i, name in enumerate(ANGLE_NAMES)}
+
+NUM_KEYPOINTS = 17  # COCO pose keypoints
+
+_TRIPLET_IDX = np.array([t[1:] for t in JOINT_TRIPLETS], dtype=np.intp)
+
+
+def _averaging_matrix(ends):
+    matrix = np.zeros((len(ends), NUM_KEYPOINTS), dtype=np.float32)
+    for row, indices in enumerate(ends):
+        matrix[row, list(indices)] = 1.0 / len(indices)
+    return matrix
+
+
+_DISTANCE_END_A = _averaging_matrix([pair[1] for pair in JOINT_DISTANCE_PAIRS])
+_DISTANCE_END_B = _averaging_matrix([pair[2] for pair in JOINT_DISTANCE_PAIRS])
+
 def calculate_angle(point1, point2, point3):
     """
     Calculate the angle between three keypoints.
@@ -30,72 +72,102 @@ def is_valid_keypoint(keypoint):
     x, y = keypoint[:2]
     return not (x == 0 and y == 0)
 
+def keypoints_to_array(keypoints, num_keypoints=NUM_KEYPOINTS):
+    """
+    Convert a per-frame keypoint list (entries may be None or tensors) into a (K, 3) float32 array.
+    Missing keypoints become (0, 0, 0) so they are treated as invalid. If only (x, y) is given,
+    the confidence column is set to 1.
+    """
+    arr = np.zeros((num_keypoints, 3), dtype=np.float32)
+    if keypoints is None:
+        return arr
+    if isinstance(keypoints, np.ndarray) and keypoints.ndim == 2:
+        rows = min(keypoints.shape[0], num_keypoints)
+        cols = min(keypoints.shape[1], 3)
+        arr[:rows, :cols] = keypoints[:rows, :cols]
+        if cols == 2:
+            arr[:rows, 2] = 1.0
+        return arr
+    for idx, kp in enumerate(list(keypoints)[:num_keypoints]):
+        if kp is None:
+            continue
+        kp = np.asarray(kp, dtype=np.float32).ravel()
+        arr[idx, :min(kp.shape[0], 3)] = kp[:3]
+        if kp.shape[0] == 2:
+            arr[idx, 2] = 1.0
+    return arr
+
+def keypoint_validity_mask(keypoints, min_confidence=0.0):
+    """
+    Vectorized is_valid_keypoint for a (..., K, 3) array.
+    A keypoint is valid when it is finite, not exactly (0, 0) and its confidence is >= min_confidence.
+    """
+    xy = keypoints[..., :2]
+    valid = np.isfinite(xy).all(axis=-1) & ~((xy[..., 0] == 0) & (xy[..., 1] == 0))
+    if min_confidence > 0:
+        valid &= keypoints[..., 2] >= min_confidence
+    return valid
+
+def calculate_joint_angles_batch(keypoints, min_confidence=0.0):
+    """
+    Calculate all joint angles in JOINT_TRIPLETS for a whole clip in one NumPy pass.
+    keypoints: (N, K, 3) array of (x, y, confidence), or a single (K, 3) frame.
+    Returns a float32 array of shape (N, len(JOINT_TRIPLETS)) in degrees, with NaN where
+    a keypoint is missing/low-confidence or a limb has zero length. Column order is ANGLE_NAMES.
+    """
+    kp = np.asarray(keypoints, dtype=np.float32)
+    single = kp.ndim == 2
+    if single:
+        kp = kp[None]
+
+    points = kp[:, _TRIPLET_IDX, :2]              # (N, J, 3, 2)
+    vector1 = points[:, :, 0] - points[:, :, 1]
+    vector2 = points[:, :, 2] - points[:, :, 1]
+    dot_product = np.einsum('njc,njc->nj', vector1, vector2)
+    magnitudes = np.hypot(vector1[..., 0], vector1[..., 1]) * np.hypot(vector2[..., 0], vector2[..., 1])
+
+    valid = keypoint_validity_mask(kp, min_confidence)[:, _TRIPLET_IDX].all(axis=-1) & (magnitudes > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cosine = np.clip(dot_product / magnitudes, -1.0, 1.0)
+    angles = np.degrees(np.arccos(cosine)).astype(np.float32)
+    angles[~valid] = np.nan
+    return angles[0] if single else angles
+
+def calculate_joint_distances_batch(keypoints, min_confidence=0.0):
+    """
+    Calculate all distances in JOINT_DISTANCE_PAIRS for (N, K, 3) keypoints.
+    Returns a float32 array of shape (N, len(JOINT_DISTANCE_PAIRS)) with NaN where unavailable.
+    """
+    kp = np.asarray(keypoints, dtype=np.float32)
+    single = kp.ndim == 2
+    if single:
+        kp = kp[None]
+
+    # End points are weighted averages of keypoints, so all pairs are two matrix products.
+    # Invalid keypoints are zeroed first: a NaN anywhere would otherwise spread to every product (0 * NaN = NaN).
+    valid_mask = keypoint_validity_mask(kp, min_confidence)
+    xy = np.where(valid_mask[..., None], kp[..., :2], 0.0)
+    point_a = np.matmul(_DISTANCE_END_A, xy)
+    point_b = np.matmul(_DISTANCE_END_B, xy)
+    valid = valid_mask.astype(np.float32)
+    ok = ((valid @ (_DISTANCE_END_A > 0).T) == (_DISTANCE_END_A > 0).sum(axis=1)) & \
+         ((valid @ (_DISTANCE_END_B > 0).T) == (_DISTANCE_END_B > 0).sum(axis=1))
+    delta = point_a - point_b
+    distances = np.hypot(delta[..., 0], delta[..., 1])
+    distances[~ok] = np.nan
+    return distances[0] if single else distances
+
+def values_to_dict(values, names=ANGLE_NAMES):
+    """Convert one row of a batch result into the {name: value} dict used by the strategies."""
+    return {name: float(value) for name, value in zip(names, values) if not np.isnan(value)}
+
 def calculate_joint_angles(keypoints):
-    # print("KEYPOINTS FROM ANGLES:", keypoints)
     """
     Calculate angles for all key joints based on the detected keypoints.
     Returns a dictionary with joint names as keys and their calculated angles as values.
     """
-    joint_angles = {}
-
-    # Right Elbow (shoulder, elbow, wrist)
-    if is_valid_keypoint(keypoints[6]) and is_valid_keypoint(keypoints[8]) and is_valid_keypoint(keypoints[10]):
-        angle = calculate_angle(keypoints[6][:2], keypoints[8][:2], keypoints[10][:2])
-        if angle is not None:
-            joint_angles['Right Elbow'] = angle
-
-    # Left Elbow (shoulder, elbow, wrist)
-    if is_valid_keypoint(keypoints[5]) and is_valid_keypoint(keypoints[7]) and is_valid_keypoint(keypoints[9]):
-        angle = calculate_angle(keypoints[5][:2], keypoints[7][:2], keypoints[9][:2])
-        if angle is not None:
-            joint_angles['Left Elbow'] = angle
-
-    # Right Knee (hip, knee, ankle)
-    if is_valid_keypoint(keypoints[12]) and is_valid_keypoint(keypoints[14]) and is_valid_keypoint(keypoints[16]):
-        angle = calculate_angle(keypoints[12][:2], keypoints[14][:2], keypoints[16][:2])
-        if angle is not None:
-            joint_angles['Right Knee'] = angle
-
-    # Left Knee (hip, knee, ankle)
-    if is_valid_keypoint(keypoints[11]) and is_valid_keypoint(keypoints[13]) and is_valid_keypoint(keypoints[15]):
-        angle = calculate_angle(keypoints[11][:2], keypoints[13][:2], keypoints[15][:2])
-        if angle is not None:
-            joint_angles['Left Knee'] = angle
-
-    # Right Hip (shoulder, hip, knee)
-    if is_valid_keypoint(keypoints[6]) and is_valid_keypoint(keypoints[12]) and is_valid_keypoint(keypoints[14]):
-        angle = calculate_angle(keypoints[6][:2], keypoints[12][:2], keypoints[14][:2])
-        if angle is not None:
-            joint_angles['Right Hip'] = angle
-
-    # Left Hip (shoulder, hip, knee)
-    if is_valid_keypoint(keypoints[5]) and is_valid_keypoint(keypoints[11]) and is_valid_keypoint(keypoints[13]):
-        angle = calculate_angle(keypoints[5][:2], keypoints[11][:2], keypoints[13][:2])
-        if angle is not None:
-            joint_angles['Left Hip'] = angle
-
-    # Right Shoulder Flexion (hip, shoulder, elbow)
-    if is_valid_keypoint(keypoints[12]) and is_valid_keypoint(keypoints[6]) and is_valid_keypoint(keypoints[8]):
-        angle = calculate_angle(keypoints[12][:2], keypoints[6][:2], keypoints[8][:2])
-        if angle is not None:
-            joint_angles['Right Shoulder Flexion'] = angle
-
-    # Left Shoulder Flexion (hip, shoulder, elbow)
-    if is_valid_keypoint(keypoints[11]) and is_valid_keypoint(keypoints[5]) and is_valid_keypoint(keypoints[7]):
-        angle = calculate_angle(keypoints[11][:2], keypoints[5][:2], keypoints[7][:2])
-        if angle is not None:
-            joint_angles['Left Shoulder Flexion'] = angle
-
-    # Spine Angle (right shoulder, pelvis, left shoulder)
-    if is_valid_keypoint(keypoints[6]) and is_valid_keypoint(keypoints[12]) and is_valid_keypoint(keypoints[5]):
-        angle = calculate_angle(keypoints[6][:2], keypoints[12][:2], keypoints[5][:2])
-        if angle is not None:
-            joint_angles['Spine Angle'] = angle
-
-    # Right Ankle Dorsiflexion (knee, ankle, toes)
-    # Add checks if you have toe keypoints; otherwise, comment out or adjust
-    # print(joint_angles)
-    return joint_angles
+    angles = calculate_joint_angles_batch(keypoints_to_array(keypoints))
+    return values_to_dict(angles, ANGLE_NAMES)
 
 def calculate_distance(point1, point2):
     """
@@ -109,23 +181,15 @@ def calculate_joint_distances(keypoints):
     Calculate the distances between key joints such as hip-shoulder width, shoulder-knee distance, etc.
     Useful for analyzing overall posture.
     """
+    # Only three distances per frame: plain float math beats array set-up cost here
+    kp = keypoints_to_array(keypoints).tolist()
     joint_distances = {}
-
-    # Shoulder width (distance between left and right shoulder)
-    if is_valid_keypoint(keypoints[5]) and is_valid_keypoint(keypoints[6]):
-        distance = calculate_distance(keypoints[5][:2], keypoints[6][:2])
-        joint_distances['Shoulder Width'] = distance
-
-    # Hip width (distance between left and right hip)
-    if is_valid_keypoint(keypoints[11]) and is_valid_keypoint(keypoints[12]):
-        distance = calculate_distance(keypoints[11][:2], keypoints[12][:2])
-        joint_distances['Hip Width'] = distance
-
-    # Spine length (distance between shoulders and pelvis)
-    if is_valid_keypoint(keypoints[11]) and is_valid_keypoint(keypoints[12]) and is_valid_keypoint(keypoints[5]) and is_valid_keypoint(keypoints[6]):
-        spine_midpoint = (keypoints[5][:2] + keypoints[6][:2]) / 2
-        pelvis_midpoint = (keypoints[11][:2] + keypoints[12][:2]) / 2
-        distance = calculate_distance(spine_midpoint, pelvis_midpoint)
-        joint_distances['Spine Length'] = distance
-
+    for name, end_a, end_b in JOINT_DISTANCE_PAIRS:
+        if not all(is_valid_keypoint(kp[idx]) for idx in end_a + end_b):
+            continue
+        ax = sum(kp[idx][0] for idx in end_a) / len(end_a)
+        ay = sum(kp[idx][1] for idx in end_a) / len(end_a)
+        bx = sum(kp[idx][0] for idx in end_b) / len(end_b)
+        by = sum(kp[idx][1] for idx in end_b) / len(end_b)
+        joint_distances[name] = math.hypot(ax - bx, ay - by)
     return joint_distances
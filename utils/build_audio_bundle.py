@@ -0,0 +1,127 @@
+"""
+Build-time tool that makes sure every feedback message the strategies can emit has audio,
+so no workout ever waits on text-to-speech.
+
+    python -m utils.build_audio_bundle               # synthesize missing clips, then pack the bundle
+    python -m utils.build_audio_bundle --pack-only   # pack the clips that already exist (no API calls)
+    python -m utils.build_audio_bundle --list        # print the collected messages
+
+Messages are collected statically from strategies/*.py: string literals passed to
+`feedback.append(...)` and `message=` keywords. Missing clips are synthesized in parallel,
+registered in feedback_audio_map.json and everything is packed into BUNDLE_FILE, which
+AudioCache memory-maps at startup.
+"""
+
+import argparse
+import ast
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.voice_utils import (
+    AUDIO_DIR, BUNDLE_FILE, Pyttsx3TextToSpeech, create_tts_backend, load_feedback_audio_map,
+    sanitize_filename, save_feedback_audio_map, write_audio_bundle,
+)
+
+STRATEGIES_DIR = 'strategies'
+
+
+def collect_feedback_messages(directory=STRATEGIES_DIR):
+    """Returns the feedback strings found in the strategy modules, in source order and without duplicates."""
+    messages = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.py'))):
+        with open(path) as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call):
+                continue
+            candidates = []
+            if isinstance(node.func, ast.Attribute) and node.func.attr == 'append' and node.args:
+                candidates.append(node.args[0])
+            candidates.extend(keyword.value for keyword in node.keywords if keyword.arg == 'message')
+            for candidate in candidates:
+                if isinstance(candidate, ast.Constant) and isinstance(candidate.value, str):
+                    if candidate.value not in messages:
+                        messages.append(candidate.value)
+                elif isinstance(candidate, ast.JoinedStr):
+                    print(f"Skipping f-string feedback in {path}:{candidate.lineno} (cannot be pre-synthesized)")
+    return messages
+
+
+def synthesize_missing(messages, feedback_audio_map, backend, workers=4):
+    """Synthesizes clips for messages without audio, in parallel. Returns the number of failures."""
+    missing = [message for message in messages
+               if not (feedback_audio_map.get(message) and os.path.exists(feedback_audio_map[message]))]
+    if not missing:
+        return 0
+
+    extension = getattr(backend, 'file_extension', 'mp3')
+    os.makedirs(AUDIO_DIR, exist_ok=True)
+
+    def synthesize(message):
+        audio_filename = os.path.join(AUDIO_DIR, f"{sanitize_filename(message)}.{extension}")
+        audio_stream = backend.synthesize_speech(message)
+        with open(audio_filename, 'wb') as f:
+            f.write(audio_stream.getvalue())
+        return audio_filename
+
+    failures = 0
+    print(f"Synthesizing {len(missing)} clips with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(synthesize, message): message for message in missing}
+        for future in as_completed(futures):
+            message = futures[future]
+            try:
+                feedback_audio_map[message] = future.result()
+                print(f"Synthesized '{message}'")
+            except Exception as e:
+                failures += 1
+                print(f"Error generating audio for feedback: {message}. Error: {str(e)}")
+    save_feedback_audio_map(feedback_audio_map)
+    return failures
+
+
+def pack_bundle(messages, feedback_audio_map, path=BUNDLE_FILE):
+    """Packs the clips of `messages` (plus any other mapped clips) into the bundle. Returns missing messages."""
+    clips = {}
+    missing = []
+    for message in list(messages) + [m for m in feedback_audio_map if m not in messages]:
+        audio_file = feedback_audio_map.get(message)
+        if not audio_file or not os.path.exists(audio_file):
+            missing.append(message)
+            continue
+        with open(audio_file, 'rb') as f:
+            clips[message] = (f.read(), os.path.splitext(audio_file)[1].lstrip('.') or 'mp3')
+    write_audio_bundle(clips, path)
+    print(f"Packed {len(clips)} clips into {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-synthesize and pack audio for every strategy feedback message.")
+    parser.add_argument('--pack-only', action='store_true', help="Don't synthesize, only pack existing clips")
+    parser.add_argument('--list', action='store_true', help="Print the collected messages and exit")
+    parser.add_argument('--backend', help="TTS backend (defaults to TTS_BACKEND or elevenlabs)")
+    parser.add_argument('--workers', type=int, default=4, help="Parallel synthesis requests")
+    parser.add_argument('--output', default=BUNDLE_FILE)
+    args = parser.parse_args()
+
+    messages = collect_feedback_messages()
+    if args.list:
+        print("\n".join(messages))
+        return
+
+    feedback_audio_map = load_feedback_audio_map()
+    if not args.pack_only:
+        backend = create_tts_backend(args.backend)
+        # pyttsx3 drives a single native engine, which can't be used from several threads
+        workers = 1 if isinstance(backend, Pyttsx3TextToSpeech) else args.workers
+        synthesize_missing(messages, feedback_audio_map, backend, workers)
+
+    missing = pack_bundle(messages, feedback_audio_map, args.output)
+    for message in missing:
+        print(f"No audio for '{message}' (it will be synthesized live)")
+
+
+if __name__ == "__main__":
+    main()
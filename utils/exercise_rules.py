@@ -1,46 +1,121 @@
-from strategies.exercise_context import ExerciseContext
+import threading
+from functools import lru_cache
+
 from strategies.pullup_strategy import PullUpStrategy
 from strategies.squat_strategy import SquatStrategy
 from strategies.bench_press_strategy import BenchPressStrategy
-from strategies.easy_exercise_strategy import EasyExerciseStrategy  # Import the new strategy
+from strategies.easy_exercise_strategy import EasyExerciseStrategy
 
 from strategies.bicep_curl_strategy import BicepCurlStrategy
 from strategies.lunge_strategy import LungeStrategy
 from strategies.overhead_press_strategy import OverheadPressStrategy
+from strategies.push_up_strategy import PushUpStrategy
+
+# Third-party packages can ship exercises by declaring an entry point in this group, e.g.
+#   [project.entry-points."deezsquats.strategies"]
+#   kettlebell swing = "my_package.swing:KettlebellSwingStrategy"
+ENTRY_POINT_GROUP = 'deezsquats.strategies'
+
+_strategy_classes = {}   # normalized name -> strategy class
+_display_names = {}      # normalized name -> name it was registered under
+_registry_lock = threading.Lock()
+_entry_points_loaded = False
+
 
-def get_exercise_strategy(exercise_type):
+@lru_cache(maxsize=256)
+def normalize_exercise_name(exercise_type):
+    """'Push-Up', 'push up' and 'pushup' all become 'pushup'. Cached, so each spelling is normalized once."""
+    return ''.join(c for c in str(exercise_type).lower() if c.isalnum())
+
+
+def register_strategy(name, strategy_class=None, aliases=()):
     """
-    Return the appropriate exercise strategy based on the selected exercise type.
+    Registers an ExerciseStrategy class under `name` (and any aliases).
+    Works as a plain call or as a class decorator:
+
+        register_strategy('squat', SquatStrategy)
+
+        @register_strategy('kettlebell swing', aliases=('kb swing',))
+        class KettlebellSwingStrategy(RuleBasedStrategy): ...
     """
-    if exercise_type.lower() == 'pull-up'.lower():
-        return PullUpStrategy()
-    elif exercise_type.lower() == 'squat'.lower():
-        return SquatStrategy()
-    elif exercise_type.lower() == 'bench press'.lower():
-        return BenchPressStrategy()
-    elif exercise_type.lower() == 'easy exercise'.lower():  # Add the new easy exercise
-        return EasyExerciseStrategy()
-    elif exercise_type.lower() == 'bicep curl'.lower():
-        return BicepCurlStrategy()
-    elif exercise_type.lower() == 'lunge'.lower():
-        return LungeStrategy()
-    elif exercise_type.lower() == 'overhead press'.lower():
-        return OverheadPressStrategy()
-    else:
+    def register(cls):
+        with _registry_lock:
+            for alias in (name,) + tuple(aliases):
+                _strategy_classes[normalize_exercise_name(alias)] = cls
+            _display_names[normalize_exercise_name(name)] = name
+        return cls
+
+    if strategy_class is not None:
+        return register(strategy_class)
+    return register
+
+
+def _load_entry_point_strategies():
+    """Registers strategies advertised by installed packages (done once, on the first unknown name)."""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    try:
+        from importlib.metadata import entry_points
+        discovered = entry_points(group=ENTRY_POINT_GROUP)
+    except Exception as e:
+        print(f"Could not list exercise strategy plugins: {e}")
+        return
+    for entry_point in discovered:
+        try:
+            register_strategy(entry_point.name, entry_point.load())
+        except Exception as e:
+            print(f"Failed to load exercise strategy plugin {entry_point.name}: {e}")
+
+
+def get_strategy_class(exercise_type):
+    key = normalize_exercise_name(exercise_type)
+    strategy_class = _strategy_classes.get(key)
+    if strategy_class is None:
+        _load_entry_point_strategies()
+        strategy_class = _strategy_classes.get(key)
+    if strategy_class is None:
         raise ValueError(f"Exercise type {exercise_type} is not supported")
+    return strategy_class
+
+
+def registered_exercises():
+    """Names of all registered exercises (without aliases)."""
+    _load_entry_point_strategies()
+    return sorted(_display_names.values())
+
 
-def check_exercise_form(exercise_type, joint_angles, joint_distances=None):
+register_strategy('pull-up', PullUpStrategy, aliases=('chin-up',))
+register_strategy('squat', SquatStrategy)
+register_strategy('bench press', BenchPressStrategy)
+register_strategy('easy exercise', EasyExerciseStrategy)
+register_strategy('bicep curl', BicepCurlStrategy, aliases=('curl', 'biceps curl'))
+register_strategy('lunge', LungeStrategy)
+register_strategy('overhead press', OverheadPressStrategy, aliases=('shoulder press', 'military press'))
+register_strategy('push-up', PushUpStrategy, aliases=('press-up',))
+
+
+def get_exercise_strategy(exercise_type, instances=None):
     """
-    This function will be called from `app.py` and it will manage which strategy to use.
-    It runs the form-checking logic based on the exercise type.
+    Return the appropriate exercise strategy based on the selected exercise type.
+    If an `instances` dict is given (e.g. one kept in st.session_state), the strategy object
+    is created once per exercise and reused, so it can keep precomputed or temporal state.
+    Without it a new instance is returned.
     """
-    # Get the strategy for the selected exercise
-    strategy = get_exercise_strategy(exercise_type)
-    
-    # Create the context with the selected strategy
-    exercise_context = ExerciseContext(strategy)
+    if instances is None:
+        return get_strategy_class(exercise_type)()
+    key = normalize_exercise_name(exercise_type)
+    strategy = instances.get(key)
+    if strategy is None:
+        strategy = instances[key] = get_strategy_class(exercise_type)()
+    return strategy
 
-    # Check the form using the selected strategy
-    feedback = exercise_context.check_exercise_form(joint_angles, joint_distances)
 
-    return feedback
+def check_exercise_form(exercise_type, joint_angles, joint_distances=None, instances=None):
+    """
+    This function will be called from `app.py` and it will manage which strategy to use.
+    It runs the form-checking logic based on the exercise type.
+    """
+    strategy = get_exercise_strategy(exercise_type, instances)
+    return strategy.check_form(joint_angles, joint_distances)
@@ -20,8 +20,10 @@ class FeedbackManager:
             # Add other feedback types as needed
         }
 
-    def update_feedback(self, violations):
-        current_time = time.time()
+    def update_feedback(self, violations, current_time=None):
+        # current_time can be a video timestamp when replaying offline results
+        if current_time is None:
+            current_time = time.time()
         # Check if cooldown period has elapsed
         if current_time - self.last_feedback_time < self.cooldown and self.current_feedback_message:
             return [self.current_feedback_message]
@@ -0,0 +1,126 @@
+# inference_scheduler.py
+
+import math
+
+import cv2
+import numpy as np
+
+# Input sizes to choose from, largest (most accurate) first; YOLO needs multiples of 32
+IMGSZ_OPTIONS = (640, 512, 416, 320)
+
+
+def motion_score(frame, previous_small=None, size=(64, 48)):
+    """
+    Cheap whole-frame motion measure: mean absolute difference of two tiny grayscale thumbnails,
+    from 0 (identical) to 1. Returns (score, thumbnail); pass the thumbnail back in on the next call.
+    """
+    # INTER_LINEAR only samples a few pixels per output pixel: ~25 us for a 640x480 frame (INTER_AREA: ~500 us)
+    small = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR), cv2.COLOR_BGR2GRAY)
+    if previous_small is None:
+        return 0.0, small
+    return float(cv2.absdiff(small, previous_small).mean()) / 255.0, small
+
+
+class InferenceScheduler:
+    """
+    Decides which frames get pose inference, and at what input size.
+
+    - Rate: frame-difference motion (smoothed) is mapped between `still_motion` and `moving_motion`
+      to a target rate between `min_fps` (user standing still) and `max_fps` (mid-rep). The rate is
+      capped at what the measured inference time allows.
+    - Input size: the largest of `imgsz_options` whose measured (or, before it has been tried,
+      area-scaled) inference time fits `latency_budget_ms`. Moving up needs a 30% margin, so the
+      size doesn't flip back and forth.
+    Inference times come from record_inference(). Decisions are published as profiler gauges
+    (scheduler_fps, scheduler_imgsz, motion) and skipped frames as the scheduler_skipped counter.
+    adapt_imgsz=False keeps the model's own input size (offline analysis, where accuracy wins).
+    aligned=True infers the first frame of each 1/fps slot of a fixed time grid instead of waiting
+    1/fps after the last inference, so the frames picked don't depend on where analysis started
+    (offline analysis split into segments picks the same frames as one pass).
+    """
+
+    def __init__(self, latency_budget_ms=100.0, min_fps=2.0, max_fps=30.0, still_motion=0.004,
+                 moving_motion=0.02, imgsz_options=IMGSZ_OPTIONS, adapt_imgsz=True, aligned=False, profiler=None):
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.min_fps = min_fps
+        self.max_fps = max(max_fps, min_fps)
+        self.still_motion = still_motion
+        self.moving_motion = moving_motion
+        self.imgsz_options = tuple(sorted(imgsz_options, reverse=True))
+        self.adapt_imgsz = adapt_imgsz
+        self.aligned = aligned
+        self.profiler = profiler
+        self.reset()
+
+    def reset(self):
+        self.motion = 0.0
+        self.imgsz = self.imgsz_options[0] if self.adapt_imgsz else None
+        self._latency = {}          # imgsz -> smoothed seconds per inference
+        self._thumbnail = None
+        self._last_inference = None
+
+    def observe(self, frame):
+        """Updates the motion estimate with a new frame (call for every frame, inferred or not)."""
+        score, self._thumbnail = motion_score(frame, self._thumbnail)
+        # Rise fast (a rep starts), decay slowly (don't drop the rate at the top of each rep)
+        rate = 0.5 if score > self.motion else 0.1
+        self.motion += rate * (score - self.motion)
+        return self.motion
+
+    def estimated_latency(self, imgsz):
+        """Smoothed inference seconds at imgsz; untried sizes are scaled by area from the nearest tried one."""
+        if imgsz in self._latency:
+            return self._latency[imgsz]
+        tried = [size for size in self._latency if size is not None]
+        if imgsz is None or not tried:
+            return None
+        nearest = min(tried, key=lambda size: abs(size - imgsz))
+        return self._latency[nearest] * (imgsz / nearest) ** 2
+
+    def target_fps(self):
+        activity = float(np.clip((self.motion - self.still_motion) / max(self.moving_motion - self.still_motion, 1e-9), 0.0, 1.0))
+        fps = self.min_fps + activity * (self.max_fps - self.min_fps)
+        latency = self.estimated_latency(self.imgsz)
+        if latency:
+            fps = min(fps, 1.0 / latency)
+        return max(fps, self.min_fps)
+
+    def should_infer(self, timestamp):
+        """True if the frame at `timestamp` (seconds) is due for inference at the current target rate."""
+        fps = self.target_fps()
+        if self._last_inference is None:
+            due = True
+        elif self.aligned:
+            due = math.floor(timestamp * fps + 1e-6) > math.floor(self._last_inference * fps + 1e-6)
+        else:
+            due = timestamp - self._last_inference >= 1.0 / fps - 1e-6
+        if due:
+            self._last_inference = timestamp
+        elif self.profiler is not None:
+            self.profiler.increment('scheduler_skipped')
+        if self.profiler is not None:
+            self.profiler.set_gauge('scheduler_fps', round(fps, 2))
+            self.profiler.set_gauge('motion', round(self.motion, 4))
+        return due
+
+    def record_inference(self, seconds, imgsz=None):
+        """Feeds back how long an inference at imgsz took, and re-picks the input size."""
+        imgsz = imgsz if imgsz is not None else self.imgsz
+        previous = self._latency.get(imgsz)
+        self._latency[imgsz] = seconds if previous is None else previous + 0.2 * (seconds - previous)
+        if self.adapt_imgsz:
+            self.imgsz = self._pick_imgsz()
+            if self.profiler is not None:
+                self.profiler.set_gauge('scheduler_imgsz', self.imgsz)
+
+    def _pick_imgsz(self):
+        current = self.imgsz_options.index(self.imgsz)
+        latency = self.estimated_latency(self.imgsz)
+        if latency is not None and latency > self.latency_budget and current + 1 < len(self.imgsz_options):
+            return self.imgsz_options[current + 1]
+        if current > 0:
+            larger = self.imgsz_options[current - 1]
+            estimate = self.estimated_latency(larger)
+            if estimate is not None and estimate < 0.7 * self.latency_budget:
+                return larger
+        return self.imgsz
@@ -0,0 +1,156 @@
+# inference_server.py
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.model_utils import get_model
+
+
+class InferenceServer:
+    """
+    In-process inference service shared by every Streamlit session.
+    Frames submitted from any session are collected into micro-batches (up to max_batch_size,
+    waiting at most max_latency_ms after the first frame arrives), run through the backend in
+    one call, and the results are routed back to the caller's Future.
+
+    The server has the same predict(frames) method as a PoseBackend, so it can be passed
+    anywhere a model is expected. predict() gives up after result_timeout seconds, and stop()
+    fails every request still waiting, so callers never block on a server that is gone.
+    """
+
+    def __init__(self, backend, max_batch_size=8, max_latency_ms=15, result_timeout=60.0):
+        self.backend = backend
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_latency = max_latency_ms / 1000.0
+        self.result_timeout = result_timeout
+        self._requests = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {'batches': 0, 'frames': 0, 'inference_seconds': 0.0}
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, imgsz=None):
+        """Queues one BGR frame and returns a Future that resolves to its PoseResult."""
+        future = Future()
+        if self._stop_event.is_set():
+            future.set_exception(RuntimeError('inference server stopped'))
+            return future
+        self._requests.put((frame, imgsz, future))
+        if self._stop_event.is_set():
+            self._fail_pending()  # stop() may have drained the queue just before this put
+        return future
+
+    def predict(self, frames, imgsz=None):
+        """
+        Blocking call: runs the frames through the shared batcher and returns their PoseResults.
+        Raises TimeoutError if they aren't done within result_timeout seconds.
+        """
+        futures = [self.submit(frame, imgsz) for frame in frames]
+        deadline = time.perf_counter() + self.result_timeout if self.result_timeout else None
+        try:
+            return [future.result(timeout=None if deadline is None else max(deadline - time.perf_counter(), 0.0))
+                    for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()  # No-op for finished ones; the server skips cancelled requests
+
+    def __call__(self, frames, imgsz=None):
+        return self.predict(frames, imgsz)
+
+    def cache_id(self):
+        return self.backend.cache_id()
+
+    def _collect_batch(self):
+        """Blocks for the first request, then gathers more until the batch is full or the deadline passes."""
+        try:
+            batch = [self._requests.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._requests.get(timeout=remaining))
+                else:
+                    # Deadline passed: still take whatever is already waiting
+                    batch.append(self._requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _serve(self):
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            # Skip requests whose caller has gone away
+            batch = [request for request in batch if request[2].set_running_or_notify_cancel()]
+            # Frames for different input sizes (e.g. ROI crops) can't share a backend call
+            groups = {}
+            for request in batch:
+                groups.setdefault(request[1], []).append(request)
+            for imgsz, group in groups.items():
+                self._run_group(group, imgsz)
+
+    def _run_group(self, group, imgsz):
+        start = time.perf_counter()
+        try:
+            results = self.backend.predict([frame for frame, _, _ in group], imgsz)
+        except Exception as e:
+            for _, _, future in group:
+                future.set_exception(e)
+            return
+        elapsed = time.perf_counter() - start
+
+        for (_, _, future), result in zip(group, results):
+            future.set_result(result)
+        with self._stats_lock:
+            self._stats['batches'] += 1
+            self._stats['frames'] += len(group)
+            self._stats['inference_seconds'] += elapsed
+
+    def stats(self):
+        """Returns batch count, frame count, mean batch size and mean inference time per batch."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = stats['batches'] or 1
+        stats['mean_batch_size'] = stats['frames'] / batches
+        stats['mean_batch_ms'] = 1000 * stats['inference_seconds'] / batches
+        stats['queued'] = self._requests.qsize()
+        return stats
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join(timeout=2)
+        self._fail_pending()
+
+    def _fail_pending(self):
+        """Resolves every queued request with an error (after stop())."""
+        while True:
+            try:
+                _, _, future = self._requests.get_nowait()
+            except queue.Empty:
+                return
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError('inference server stopped'))
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_inference_server(max_batch_size=None, max_latency_ms=None):
+    """
+    Returns the process-wide inference server, starting it on first use.
+    Defaults come from the INFERENCE_MAX_BATCH and INFERENCE_MAX_LATENCY_MS environment variables.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            max_batch_size = max_batch_size or int(os.environ.get('INFERENCE_MAX_BATCH', 8))
+            max_latency_ms = max_latency_ms or float(os.environ.get('INFERENCE_MAX_LATENCY_MS', 15))
+            _server = InferenceServer(get_model(), max_batch_size=max_batch_size, max_latency_ms=max_latency_ms)
+    return _server
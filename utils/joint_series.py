@@ -0,0 +1,147 @@
+# joint_series.py
+
+import numpy as np
+
+from utils.angle_utils import ANGLE_NAMES
+
+
+class JointSeriesStore:
+    """
+    Array-backed time series of joint values (one float32 column per joint, NaN = not detected)
+    with a float64 timestamp per row.
+
+    - Unbounded mode (ring_capacity=None): storage grows geometrically, for whole uploaded videos.
+    - Ring mode (ring_capacity=N): only the newest N rows are kept, so memory is bounded
+      (N * joints * 4 bytes + N * 8 bytes) no matter how long a live session runs. Storage starts at
+      initial_capacity rows and grows up to N, so short-lived series (e.g. a person tracked for a
+      few seconds) stay small.
+
+    values()/timestamps() return views into the storage (no copy) whenever the rows are
+    contiguous, which is always the case until a ring buffer wraps around.
+    """
+
+    def __init__(self, names=ANGLE_NAMES, ring_capacity=None, initial_capacity=1024):
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.ring = ring_capacity is not None
+        self.ring_capacity = ring_capacity
+        capacity = max(1, min(ring_capacity, initial_capacity) if self.ring else initial_capacity)
+        self._values = np.full((capacity, len(self.names)), np.nan, dtype=np.float32)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._start = 0   # Index of the oldest row (ring mode)
+        self._size = 0
+        self.total_appended = 0
+
+    @classmethod
+    def from_arrays(cls, values, timestamps, names=ANGLE_NAMES):
+        """Wraps existing (N, J) values and (N,) timestamps without copying them."""
+        store = cls(names, initial_capacity=1)
+        store._values = np.asarray(values, dtype=np.float32)
+        store._timestamps = np.asarray(timestamps, dtype=np.float64)
+        store._size = store.total_appended = len(store._values)
+        return store
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._values)
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes + self._timestamps.nbytes
+
+    def _grow(self, needed, limit=None):
+        capacity = max(self.capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        if limit is not None:
+            capacity = min(capacity, limit)
+        values = np.full((capacity, len(self.names)), np.nan, dtype=np.float32)
+        timestamps = np.zeros(capacity, dtype=np.float64)
+        values[:self._size] = self._values[:self._size]
+        timestamps[:self._size] = self._timestamps[:self._size]
+        self._values, self._timestamps = values, timestamps
+
+    def append(self, values, timestamp):
+        """Appends one row. values is a (J,) array in `names` order or a {name: value} dict."""
+        if isinstance(values, dict):
+            row = np.full(len(self.names), np.nan, dtype=np.float32)
+            for name, value in values.items():
+                if name in self.index:
+                    row[self.index[name]] = value
+            values = row
+
+        if self.ring:
+            if self._size == self.capacity < self.ring_capacity:
+                # Still filling up: the rows haven't wrapped, so they can be copied as they are
+                self._grow(self._size + 1, limit=self.ring_capacity)
+            position = (self._start + self._size) % self.capacity
+            if self._size == self.capacity:
+                self._start = (self._start + 1) % self.capacity
+            else:
+                self._size += 1
+        else:
+            if self._size == self.capacity:
+                self._grow(self._size + 1)
+            position = self._size
+            self._size += 1
+
+        self._values[position] = values
+        self._timestamps[position] = timestamp
+        self.total_appended += 1
+
+    def extend(self, values, timestamps):
+        """Appends (N, J) rows at once."""
+        values = np.asarray(values, dtype=np.float32)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if self.ring:
+            # Only the last `ring_capacity` rows can survive
+            values, timestamps = values[-self.ring_capacity:], timestamps[-self.ring_capacity:]
+            for row, timestamp in zip(values, timestamps):
+                self.append(row, timestamp)
+            return
+        needed = self._size + len(values)
+        if needed > self.capacity:
+            self._grow(needed)
+        self._values[self._size:needed] = values
+        self._timestamps[self._size:needed] = timestamps
+        self._size = needed
+        self.total_appended += len(values)
+
+    def _ordered(self, array):
+        end = self._start + self._size
+        if end <= len(array):
+            return array[self._start:end]  # View
+        # Wrapped ring buffer: the only case that needs a copy
+        return np.concatenate((array[self._start:], array[:end - len(array)]))
+
+    def values(self):
+        """(N, J) values in chronological order."""
+        return self._ordered(self._values)
+
+    def timestamps(self):
+        """(N,) timestamps in chronological order."""
+        return self._ordered(self._timestamps)
+
+    def mask(self):
+        """(N, J) boolean mask of detected values."""
+        return ~np.isnan(self.values())
+
+    def column(self, name):
+        """Values of one joint over time (a view unless the ring buffer has wrapped)."""
+        return self.values()[:, self.index[name]]
+
+    def has_data(self, name):
+        return bool(np.any(~np.isnan(self.column(name))))
+
+    def latest(self, count=1):
+        """The newest `count` rows as (values, timestamps)."""
+        count = min(count, self._size)
+        return self.values()[self._size - count:], self.timestamps()[self._size - count:]
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+        self.total_appended = 0
@@ -0,0 +1,151 @@
+# keypoint_cache.py
+
+import hashlib
+import io
+import json
+import os
+import threading
+
+import numpy as np
+
+CACHE_DIR = os.environ.get('KEYPOINT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'deezsquats', 'keypoints'))
+CACHE_MAX_BYTES = int(float(os.environ.get('KEYPOINT_CACHE_MAX_MB', 500)) * 1024 * 1024)
+
+# analyze_video() outputs stored as arrays; everything else (fps, stride, stats) goes in the metadata
+_ARRAY_FIELDS = ('keypoints', 'frame_indices', 'timestamps')
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents, read in chunks so memory stays constant."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_cache_id(model):
+    """What a model's keypoints depend on (backend, weights, input size, thresholds), or its class name."""
+    cache_id = getattr(model, 'cache_id', None)
+    return cache_id() if cache_id is not None else {'model': type(model).__name__}
+
+
+class KeypointCache:
+    """
+    Content-addressed on-disk cache of analyze_video() results, so analysing the same upload again
+    (e.g. as another exercise) skips inference.
+
+    Entries are keyed by the video's content hash, the model identity and the analysis settings,
+    and stored as one compressed .npz per entry (arrays plus JSON metadata). Reading an entry marks
+    it as recently used; when the directory grows past max_bytes the least recently used entries
+    are deleted. Files are written to a temporary name and renamed, so concurrent sessions never
+    read half-written entries.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, video_digest, model, settings):
+        """Cache key for a video (its file_digest) analysed by `model` with `settings` (a JSON-able dict)."""
+        identity = {'video': video_digest, 'model': model_cache_id(model), 'settings': settings}
+        return hashlib.sha256(json.dumps(identity, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Returns the cached analysis dict (with stats['cached'] = True), or None."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                analysis = {field: data[field] for field in _ARRAY_FIELDS}
+                metadata = json.loads(str(data['metadata']))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Dropping unreadable keypoint cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        analysis.update(metadata)
+        analysis['stats'] = dict(analysis.get('stats', {}), cached=True)
+        return analysis
+
+    def put(self, key, analysis):
+        """
+        Stores an analyze_video() result and evicts old entries if the cache is over its size limit.
+        Returns the entry's path, or None if it couldn't be written (a full disk must not fail the analysis).
+        """
+        metadata = {name: value for name, value in analysis.items() if name not in _ARRAY_FIELDS}
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, metadata=np.array(json.dumps(metadata, default=float)),
+                            **{field: np.asarray(analysis[field]) for field in _ARRAY_FIELDS})
+        path = self._path(key)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_path, 'wb') as f:
+                f.write(buffer.getbuffer())
+            os.replace(temporary_path, path)
+        except OSError as e:
+            print(f"Could not store keypoint cache entry {path}: {e}")
+            self._remove(temporary_path)
+            return None
+        self.evict()
+        return path
+
+    def entries(self):
+        """(path, size, last used) of every entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Evicted by another session meanwhile
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+
+_keypoint_cache = None
+_keypoint_cache_lock = threading.Lock()
+
+
+def get_keypoint_cache():
+    """Returns the process-wide KeypointCache (None if the cache directory can't be created)."""
+    global _keypoint_cache
+    with _keypoint_cache_lock:
+        if _keypoint_cache is None:
+            try:
+                _keypoint_cache = KeypointCache()
+            except OSError as e:
+                print(f"Keypoint cache disabled: {e}")
+                return None
+    return _keypoint_cache
@@ -0,0 +1,139 @@
+# keypoint_filter.py
+
+import math
+
+import numpy as np
+
+from utils.angle_utils import NUM_KEYPOINTS
+
+
+def _smoothing_factor(dt, cutoff):
+    # Exponential smoothing factor of a first-order low-pass filter with this cutoff frequency (Hz)
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class KeypointFilter:
+    """
+    Streaming One-Euro filter over the (x, y) of every keypoint, with confidence gating.
+    All keypoints are filtered at once with NumPy (~0.1 ms per frame).
+
+    - One-Euro: the cutoff frequency rises with the keypoint's speed, so slow movement (and
+      jitter) is smoothed hard while fast movement is followed with little lag.
+      min_cutoff (Hz) trades jitter for lag at rest, beta how quickly the cutoff opens up.
+    - Gating: keypoints below min_confidence (or at (0, 0), how the model reports a miss) are
+      not used as measurements.
+    - Dropouts: a gated keypoint is predicted from its last position and velocity for up to
+      max_gap seconds, with its confidence decayed by prediction_decay per second; after that
+      it is reported missing (zeros) and its filter restarts on the next measurement.
+
+    Input and output are (K, 3) arrays of (x, y, confidence); None means nobody was detected.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.02, d_cutoff=1.0, min_confidence=0.3,
+                 max_gap=0.3, prediction_decay=1.5, num_keypoints=NUM_KEYPOINTS):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.min_confidence = min_confidence
+        self.max_gap = max_gap
+        self.prediction_decay = prediction_decay
+        self.num_keypoints = num_keypoints
+        self.reset()
+
+    def reset(self):
+        k = self.num_keypoints
+        self._position = np.zeros((k, 2), dtype=np.float64)
+        self._velocity = np.zeros((k, 2), dtype=np.float64)   # Pixels per second (filtered)
+        self._confidence = np.zeros(k, dtype=np.float64)      # Last measured confidence
+        self._last_seen = np.full(k, -np.inf)                 # Time of the last measurement
+        self._tracking = np.zeros(k, dtype=bool)
+        self._time = None
+
+    def predict(self, timestamp):
+        """Where the tracked keypoints should be at `timestamp` (constant velocity), without updating the filter."""
+        output = np.zeros((self.num_keypoints, 3), dtype=np.float32)
+        if self._time is None:
+            return output
+        dt = max(timestamp - self._time, 0.0)
+        output[:, :2] = np.where(self._tracking[:, None], self._position + self._velocity * dt, 0.0)
+        output[:, 2] = np.where(self._tracking, self._confidence, 0.0)
+        return output
+
+    def __call__(self, keypoints, timestamp):
+        return self.update(keypoints, timestamp)
+
+    def update(self, keypoints, timestamp):
+        """Filters one frame. Returns the (K, 3) filtered keypoints, or None if nothing is tracked."""
+        k = self.num_keypoints
+        if keypoints is None:
+            measured = np.zeros((k, 3), dtype=np.float64)
+        else:
+            measured = np.asarray(keypoints, dtype=np.float64)[:k]
+        xy = measured[:, :2]
+        confidence = measured[:, 2]
+        valid = (confidence >= self.min_confidence) & np.any(xy != 0, axis=1)
+
+        dt = None if self._time is None else timestamp - self._time
+        if dt is not None and dt <= 0:
+            dt = None  # Duplicate or out-of-order timestamp: don't update the motion model
+        self._time = timestamp
+
+        # Whole-array updates with masks: cheaper than fancy indexing for 17 keypoints
+        valid_xy = valid[:, None]
+        update = valid & self._tracking
+        if dt is None:
+            # Keypoints seen for the first time (or after a long gap) start from the measurement
+            self._position = np.where(valid_xy, xy, self._position)
+            self._velocity = np.where(valid_xy & ~self._tracking[:, None], 0.0, self._velocity)
+        else:
+            raw_velocity = (xy - self._position) / dt
+            velocity = self._velocity + _smoothing_factor(dt, self.d_cutoff) * (raw_velocity - self._velocity)
+            speed = np.sqrt(np.einsum('ij,ij->i', velocity, velocity))[:, None]
+            tau = 1.0 / (2 * np.pi * (self.min_cutoff + self.beta * speed))
+            alpha = 1.0 / (1.0 + tau / dt)
+            filtered = self._position + alpha * (xy - self._position)
+            update_xy = update[:, None]
+            start_xy = valid_xy & ~update_xy
+            gap = timestamp - self._last_seen
+            predicted = self._tracking & ~valid & (gap <= self.max_gap)
+            # Tracked: One-Euro step; new: the measurement; dropped out: dead reckoning
+            self._position = np.where(update_xy, filtered,
+                                      np.where(start_xy, xy,
+                                               np.where(predicted[:, None], self._position + self._velocity * dt, self._position)))
+            self._velocity = np.where(update_xy, velocity, np.where(start_xy, 0.0, self._velocity))
+
+        self._confidence = np.where(valid, confidence, self._confidence)
+        self._last_seen = np.where(valid, timestamp, self._last_seen)
+        self._tracking |= valid
+
+        # Forget keypoints gone for longer than max_gap
+        gap = timestamp - self._last_seen
+        predicted = self._tracking & ~valid & (gap <= self.max_gap)
+        lost = self._tracking & ~valid & ~predicted
+        if lost.any():
+            self._tracking &= ~lost
+            self._velocity[lost] = 0.0
+
+        if not self._tracking.any():
+            return None
+        output = np.zeros((k, 3), dtype=np.float32)
+        output[:, :2] = np.where(self._tracking[:, None], self._position, 0.0)
+        output[:, 2] = np.where(valid, confidence,
+                                np.where(predicted, self._confidence * np.exp(-self.prediction_decay * gap), 0.0))
+        return output
+
+
+def smooth_keypoint_series(keypoints, timestamps, keypoint_filter=None):
+    """
+    Runs a KeypointFilter over an (N, K, 3) keypoint series (offline analysis).
+    Frames where nothing is tracked come back as zeros, like frames without a person.
+    """
+    keypoint_filter = keypoint_filter or KeypointFilter()
+    smoothed = np.zeros_like(keypoints, dtype=np.float32)
+    for index, (frame_keypoints, timestamp) in enumerate(zip(keypoints, timestamps)):
+        # All-zero frames are how analyze_video reports "nobody detected"
+        filtered = keypoint_filter.update(frame_keypoints if frame_keypoints.any() else None, float(timestamp))
+        if filtered is not None:
+            smoothed[index] = filtered
+    return smoothed
@@ -0,0 +1,212 @@
+# live_pipeline.py
+
+import threading
+import time
+
+import cv2
+
+from utils.model_utils import get_keypoints_from_frame
+from utils.profiling_utils import Profiler
+
+
+class LatestFrameCapture(threading.Thread):
+    """
+    Reads the camera as fast as it delivers frames and keeps only the most recent one.
+    Frames nobody picked up before the next one arrived are dropped, never queued.
+    """
+
+    def __init__(self, cap, profiler, mirror=True):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.profiler = profiler
+        self.mirror = mirror
+        self.failed = False
+        self._condition = threading.Condition()
+        self._latest = None  # (frame_id, frame, capture_time)
+        self._taken_id = -1
+        self._stop_event = threading.Event()
+
+    def run(self):
+        frame_id = 0
+        while not self._stop_event.is_set():
+            with self.profiler.span('capture'):
+                ret, frame = self.cap.read()
+                if ret and self.mirror:
+                    # Flip the frame horizontally for a mirror effect
+                    frame = cv2.flip(frame, 1)
+            if not ret:
+                self.failed = True
+                break
+            with self._condition:
+                if self._latest is not None and self._latest[0] > self._taken_id:
+                    self.profiler.increment('dropped_frames')
+                self._latest = (frame_id, frame, time.perf_counter())
+                self._condition.notify_all()
+            frame_id += 1
+        with self._condition:
+            self._condition.notify_all()
+
+    def take(self, timeout=1.0):
+        """Waits for a frame newer than the last one taken and returns it (or None)."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._stop_event.is_set() or self.failed
+                or (self._latest is not None and self._latest[0] > self._taken_id),
+                timeout=timeout,
+            )
+            if self._latest is None or self._latest[0] <= self._taken_id:
+                return None
+            self._taken_id = self._latest[0]
+            return self._latest
+
+    def stop(self):
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+
+
+class InferenceWorker(threading.Thread):
+    """
+    Runs pose estimation on the latest captured frame and publishes the latest result.
+    If a keypoint_filter is given, keypoints are smoothed with it (in capture order, using
+    capture timestamps) before being published.
+    If a tracker (PersonTracker) is given, every detected person is tracked instead and the
+    result also carries 'people': one dict (id, keypoints, box, session) per tracked person.
+    If a scheduler (InferenceScheduler) is given, it picks which frames are inferred and at what
+    input size; the others are published with inferred=False and no keypoints, so the video keeps
+    its frame rate while inference backs off. A skipped frame never replaces an inferred result that
+    hasn't been taken yet; it only becomes that result's frame.
+    """
+
+    def __init__(self, capture, model, profiler, keypoint_filter=None, tracker=None, scheduler=None):
+        super().__init__(daemon=True)
+        self.capture = capture
+        self.model = model
+        self.profiler = profiler
+        self.keypoint_filter = keypoint_filter
+        self.tracker = tracker
+        self.scheduler = scheduler
+        self.error = None
+        self._condition = threading.Condition()
+        self._result = None  # dict with frame_id, frame, keypoints, results, people, capture_time, inferred
+        self._taken_id = -1
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set() and not self.capture.failed:
+                item = self.capture.take(timeout=0.5)
+                if item is None:
+                    continue
+                frame_id, frame, capture_time = item
+                imgsz = None
+                if self.scheduler is not None:
+                    with self.profiler.span('schedule'):
+                        self.scheduler.observe(frame)
+                        due = self.scheduler.should_infer(capture_time)
+                    if not due:
+                        self._publish({'frame_id': frame_id, 'frame': frame, 'keypoints': None, 'results': None,
+                                       'people': None, 'capture_time': capture_time, 'inferred': False})
+                        continue
+                    imgsz = self.scheduler.imgsz
+                inference_start = time.perf_counter()
+                with self.profiler.span('inference'):
+                    keypoints, results = get_keypoints_from_frame(frame, self.model, imgsz)
+                if self.scheduler is not None:
+                    # ROI models mostly infer crops at their own smaller size: attribute the time to the size that ran
+                    used_imgsz = getattr(self.model, 'last_imgsz', None) or imgsz
+                    self.scheduler.record_inference(time.perf_counter() - inference_start, used_imgsz)
+                people = None
+                if self.tracker is not None:
+                    with self.profiler.span('tracking'):
+                        tracks = self.tracker.update(results[0] if results else None, capture_time)
+                    people = [{'id': track.id, 'keypoints': track.keypoints, 'box': track.box, 'session': track.session}
+                              for track in tracks]
+                    keypoints = people[0]['keypoints'] if people else None  # Longest-tracked person
+                elif self.keypoint_filter is not None:
+                    with self.profiler.span('filter'):
+                        keypoints = self.keypoint_filter.update(keypoints, capture_time)
+                self._publish({
+                    'frame_id': frame_id,
+                    'frame': frame,
+                    'keypoints': keypoints,
+                    'results': results,
+                    'people': people,
+                    'capture_time': capture_time,
+                    'inferred': True,
+                })
+        except Exception as e:
+            self.error = e
+        finally:
+            with self._condition:
+                self._condition.notify_all()
+
+    def _publish(self, result):
+        with self._condition:
+            pending = self._result if self._result is not None and self._result['frame_id'] > self._taken_id else None
+            if pending is not None and pending['inferred'] and not result['inferred']:
+                # Never lose keypoints that were paid for: keep the uncollected inference and only show
+                # the newer frame with it (the skipped frame itself has nothing to analyse)
+                pending['frame'] = result['frame']
+                self.profiler.increment('dropped_frames')
+                return
+            if pending is not None:
+                self.profiler.increment('dropped_frames')
+            self._result = result
+            self._condition.notify_all()
+
+    def take(self, timeout=1.0):
+        """Waits for a result newer than the last one taken and returns it (or None)."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._stop_event.is_set() or not self.is_alive()
+                or (self._result is not None and self._result['frame_id'] > self._taken_id),
+                timeout=timeout,
+            )
+            if self._result is None or self._result['frame_id'] <= self._taken_id:
+                return None
+            self._taken_id = self._result['frame_id']
+            return self._result
+
+    def stop(self):
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+
+
+class LivePipeline:
+    """
+    Producer/consumer pipeline for live video:
+    capture thread -> inference worker -> render stage (the Streamlit script thread).
+    Each stage only ever looks at the newest item, so latency does not build up.
+    """
+
+    def __init__(self, cap, model, mirror=True, profiler=None, keypoint_filter=None, tracker=None, scheduler=None):
+        self.profiler = profiler or Profiler()
+        self.capture = LatestFrameCapture(cap, self.profiler, mirror=mirror)
+        self.worker = InferenceWorker(self.capture, model, self.profiler, keypoint_filter, tracker, scheduler)
+
+    def start(self):
+        self.capture.start()
+        self.worker.start()
+        return self
+
+    def next_result(self, timeout=1.0):
+        """Returns the newest inference result not yet rendered, or None."""
+        if self.worker.error is not None:
+            raise self.worker.error
+        return self.worker.take(timeout=timeout)
+
+    def record_latency(self, result):
+        """Records the capture-to-screen latency of a rendered result."""
+        self.profiler.record('end_to_end', time.perf_counter() - result['capture_time'])
+
+    @property
+    def running(self):
+        return self.capture.is_alive() and self.worker.is_alive()
+
+    def stop(self):
+        self.worker.stop()
+        self.capture.stop()
+        self.worker.join(timeout=2)
+        self.capture.join(timeout=2)
@@ -1,33 +1,42 @@
-import cv2
-from yolo_model.model import get_model_yolo  # Your model loading function
 import numpy as np
+from yolo_model.backends import get_backend  # Your model loading function
+from utils.angle_utils import NUM_KEYPOINTS
 
 def get_model():
-    """Loads the YOLO model."""
-    return get_model_yolo()
+    """Loads the pose inference backend (Ultralytics, ONNX Runtime or OpenVINO, see yolo_model/backends.py)."""
+    return get_backend()
 
-def get_keypoints_from_frame(frame, model):
-    """Uses the YOLO model to get keypoints from the frame."""
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = model(frame_rgb)
+def get_keypoints_from_frame(frame, model, imgsz=None):
+    """
+    Uses the pose backend to get keypoints from a BGR frame (at input size imgsz, default: the model's).
+    Returns a (K, 3) array for the first detected person (None if nobody is detected) and the results.
+    """
+    results = model.predict([frame], imgsz)
 
-    if results is not None and len(results) > 0 and results[0].keypoints is not None:
-        keypoints_data = results[0].keypoints.data[0]  # Assuming single person detection
-        num_keypoints = keypoints_data.shape[0]
+    if results and len(results[0]) > 0:
+        return extract_keypoints(results[0]), results
+    return None, results  # Return results even if nobody was detected
 
-        # Expected number of keypoints based on your model (e.g., 17 for COCO)
-        expected_num_keypoints = 20  # Adjust based on your model
+def extract_keypoints(result, num_keypoints=NUM_KEYPOINTS):
+    """
+    Returns a (K, 3) float32 array of (x, y, confidence) for the first detected person
+    in a single pose result. All zeros when nobody is detected.
+    """
+    keypoints = np.zeros((num_keypoints, 3), dtype=np.float32)
+    if result is None or len(result) == 0:
+        return keypoints
+    person = result.keypoints[0]
+    rows = min(person.shape[0], num_keypoints)
+    keypoints[:rows] = person[:rows]
+    return keypoints
 
-        # Initialize keypoints array with None
-        keypoints = [None] * expected_num_keypoints
-
-        # Fill in detected keypoints
-        for idx in range(min(num_keypoints, expected_num_keypoints)):
-            keypoints[idx] = keypoints_data[idx]
-        # print("Detected keypoints:", keypoints_data)
-        return keypoints, results
-    else:
-        # Return an array of Nones if no keypoints are detected
-        expected_num_keypoints = 20  # Adjust based on your model
-        keypoints = [None] * expected_num_keypoints
-        return keypoints, results  # Return results even if None
+def get_keypoints_from_batch(frames, model):
+    """
+    Runs the pose backend once on a list of BGR frames.
+    Returns an (N, K, 3) keypoint array (first person per frame) and the per-frame results.
+    """
+    if not frames:
+        return np.zeros((0, NUM_KEYPOINTS, 3), dtype=np.float32), []
+    results = model.predict(list(frames))
+    keypoints = np.stack([extract_keypoints(result) for result in results])
+    return keypoints, results
@@ -0,0 +1,111 @@
+# overlay_renderer.py
+
+import time
+
+import cv2
+import numpy as np
+
+from utils.angle_utils import JOINT_TRIPLETS
+from yolo_model.backends import SKELETON
+
+_BONE_COLOR = (255, 128, 0)
+_JOINT_COLOR = (0, 255, 0)
+_TEXT_COLOR = (255, 255, 255)
+_LABEL_COLOR = (0, 255, 255)
+_ANGLE_VERTICES = tuple(vertex for _, _, vertex, _ in JOINT_TRIPLETS)
+
+
+class OverlayRenderer:
+    """
+    Draws pose previews straight from keypoint arrays and returns them as JPEG bytes.
+
+    The frame is downscaled once into a buffer that is reused from frame to frame (at most
+    `max_width` pixels wide), only the skeleton, joint angles and optional labels are drawn on it,
+    and it is JPEG-encoded once. The bytes go to st.image as they are, so Streamlit doesn't
+    convert or re-encode the frame. Calls more often than `max_fps` return None (nothing to show),
+    before any work is done; max_fps=None renders every call. people=None redraws the last overlay
+    on the new frame (frames that weren't inferred). draw_frame=False draws on a black background
+    instead of the camera image, for clients that already show their own camera (a few KB per preview).
+    """
+
+    def __init__(self, max_width=640, jpeg_quality=80, max_fps=15, keypoint_confidence=0.5, draw_frame=True):
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.max_fps = max_fps
+        self.keypoint_confidence = keypoint_confidence
+        self.draw_frame = draw_frame
+        self._buffer = None
+        self._last_render = None
+        self._overlay = ((), (), ())  # people, angles, labels last drawn
+
+    def due(self, now=None):
+        """True if a preview rendered now would be shown (the preview rate allows it)."""
+        if not self.max_fps or self._last_render is None:
+            return True
+        now = time.perf_counter() if now is None else now
+        return now - self._last_render >= 1.0 / self.max_fps
+
+    def render(self, frame, people=(), angles=(), labels=()):
+        """
+        frame:  BGR image (not modified)
+        people: (K, 3) keypoint arrays, one per person, in frame pixels (None: the last ones drawn)
+        angles: angle rows (JOINT_TRIPLETS order, NaN = not detected) to print at the joints, per person
+        labels: text drawn above each person, per person
+        Returns JPEG bytes, or None if skipped to keep to max_fps.
+        """
+        if people is None:
+            people, angles, labels = self._overlay
+        else:
+            self._overlay = (people, angles, labels)
+        now = time.perf_counter()
+        if not self.due(now):
+            return None
+        self._last_render = now
+
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.max_width / width) if self.max_width else 1.0
+        size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+        if self._buffer is None or self._buffer.shape[:2] != (size[1], size[0]):
+            self._buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        if not self.draw_frame:
+            self._buffer.fill(0)
+        elif scale < 1.0:
+            cv2.resize(frame, size, dst=self._buffer, interpolation=cv2.INTER_LINEAR)
+        else:
+            np.copyto(self._buffer, frame)
+
+        for index, keypoints in enumerate(people):
+            if keypoints is None:
+                continue
+            self._draw_person(np.asarray(keypoints), scale,
+                              angles[index] if index < len(angles) else None,
+                              labels[index] if index < len(labels) else None)
+
+        ok, encoded = cv2.imencode('.jpg', self._buffer, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        return encoded.tobytes() if ok else None
+
+    def _draw_person(self, keypoints, scale, angle_row, label):
+        image = self._buffer
+        points = [(int(x * scale), int(y * scale)) for x, y in keypoints[:, :2].tolist()]
+        visible = (keypoints[:, 2] >= self.keypoint_confidence).tolist()
+        for start, end in SKELETON:
+            if visible[start] and visible[end]:
+                cv2.line(image, points[start], points[end], _BONE_COLOR, 2, cv2.LINE_AA)
+        for point, seen in zip(points, visible):
+            if seen:
+                cv2.circle(image, point, 3, _JOINT_COLOR, -1)
+        if angle_row is not None:
+            drawn = set()
+            for vertex, angle in zip(_ANGLE_VERTICES, np.asarray(angle_row).tolist()):
+                # One number per joint (the spine angle shares its vertex with the right hip)
+                if angle == angle and visible[vertex] and vertex not in drawn:  # angle == angle: not NaN
+                    drawn.add(vertex)
+                    x, y = points[vertex]
+                    cv2.putText(image, f"{angle:.0f}", (x + 6, y - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.45,
+                                _TEXT_COLOR, 1, cv2.LINE_AA)
+        if label:
+            seen_points = [point for point, seen in zip(points, visible) if seen]
+            if seen_points:
+                x = min(point[0] for point in seen_points)
+                y = min(point[1] for point in seen_points)
+                cv2.putText(image, label, (x, max(y - 12, 16)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, _LABEL_COLOR, 2, cv2.LINE_AA)
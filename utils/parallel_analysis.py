@@ -0,0 +1,190 @@
+# parallel_analysis.py
+
+import bisect
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+# Thread pools each worker caps, so N workers don't each start one thread per core
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+# Seconds decoded before each segment to prime the still-frame scheduler's motion estimate
+SCHEDULER_WARMUP_SECONDS = 1.0
+
+_worker_model = None
+
+
+def default_workers():
+    """Worker processes for parallel analysis: ANALYSIS_WORKERS, or one per CPU core."""
+    return int(os.environ.get('ANALYSIS_WORKERS', 0)) or os.cpu_count() or 1
+
+
+def keyframe_indices(video_path, fps):
+    """
+    Frame indices of the video's keyframes, from the container's packet flags (nothing is decoded).
+    None if PyAV isn't installed or the file can't be demuxed.
+    """
+    try:
+        import av
+    except ImportError:
+        return None
+    try:
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            start = stream.start_time or 0
+            indices = {int(round(float((packet.pts - start) * stream.time_base) * fps))
+                       for packet in container.demux(stream) if packet.is_keyframe and packet.pts is not None}
+    except Exception as e:
+        print(f"Could not read keyframes of {video_path}: {e}")
+        return None
+    return sorted(indices)
+
+
+def plan_segments(frame_count, fps, workers, keyframes=None, segments_per_worker=3, min_segment_seconds=10.0):
+    """
+    Splits frames [0, frame_count) into (start, end) segments, end exclusive and None for the last
+    one (the container's frame count can be off, so it reads to the end of the video).
+    A few segments per worker keep every core busy when some segments have more frames to infer than
+    others. Boundaries are moved to the nearest keyframe, so no worker decodes frames it then throws away.
+    """
+    count = int(frame_count / max(min_segment_seconds * fps, 1.0))
+    count = max(1, min(workers * segments_per_worker, count))
+    boundaries = [int(round(index * frame_count / count)) for index in range(1, count)]
+    if keyframes:
+        snapped = []
+        for boundary in boundaries:
+            position = bisect.bisect_left(keyframes, boundary)
+            candidates = keyframes[max(position - 1, 0):position + 1]
+            snapped.append(min(candidates, key=lambda keyframe: abs(keyframe - boundary)))
+        boundaries = snapped
+    edges = [0] + sorted({boundary for boundary in boundaries if 0 < boundary < frame_count})
+    return list(zip(edges, edges[1:] + [None]))
+
+
+def _init_worker(backend, model_path, threads):
+    """Caps the worker's thread pools, then loads its own copy of the model."""
+    global _worker_model
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    cv2.setNumThreads(threads)
+    # Imported here, after the thread limits are set, because importing the model imports torch
+    from yolo_model.backends import get_backend
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(threads)
+    _worker_model = get_backend(backend, model_path, num_threads=threads)
+
+
+def _analyze_segment(video_path, segment, batch_size, stride, scheduler_options, warmup_frames):
+    from utils.inference_scheduler import InferenceScheduler
+    from utils.video_pipeline import analyze_video
+
+    start, end = segment
+    scheduler = InferenceScheduler(**scheduler_options) if scheduler_options is not None else None
+    return analyze_video(video_path, _worker_model, batch_size=batch_size, stride=stride, scheduler=scheduler,
+                         start_frame=start, end_frame=end, warmup_frames=warmup_frames)
+
+
+_pool = None
+_pool_config = None
+_pool_lock = threading.Lock()
+
+
+def get_analysis_pool(workers, backend=None, model_path=None):
+    """
+    Returns the process-wide pool of analysis workers, starting it on first use. Workers keep their
+    model loaded between videos; asking for a different configuration replaces the pool.
+    """
+    global _pool, _pool_config
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    config = (workers, backend, model_path, threads)
+    with _pool_lock:
+        if _pool is None or _pool_config != config:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            # spawn: forking a process that already runs Streamlit's and the inference server's threads isn't safe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=_init_worker, initargs=(backend, model_path, threads))
+            _pool_config = config
+    return _pool
+
+
+def _discard_pool():
+    global _pool, _pool_config
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool, _pool_config = None, None
+
+
+def analyze_video_parallel(video_path, workers=None, batch_size=8, stride=1, target_fps=None,
+                           scheduler_options=None, backend=None, model_path=None, on_progress=None, profiler=None):
+    """
+    Offline analysis of a long video split into keyframe-aligned segments that worker processes
+    analyse at the same time, each with its own model (backend/model_path, default: as get_backend())
+    and a share of the CPU threads.
+
+    Segments keep the stride aligned to the start of the video, so together they analyse the same
+    frames as analyze_video() would in one pass. With scheduler_options (InferenceScheduler keyword
+    arguments) each segment thins still stretches on its own, after a warm-up on the second before
+    its start. With aligned=True most frames then match a single pass too, but not all: the motion
+    estimate carries history from before the warm-up, so a few frames just after a boundary can differ.
+    Only keypoints come back: smoothing, angles and rep counting should run over the merged result,
+    so nothing restarts at segment boundaries. on_progress(done, total) is called as segments finish.
+
+    Returns the same dict as analyze_video(), with 'segments' and 'workers' added to the stats.
+    """
+    from utils.video_pipeline import compute_stride, get_video_fps, get_video_frame_count
+
+    workers = workers or default_workers()
+    fps = get_video_fps(video_path)
+    stride = compute_stride(fps, target_fps, stride)
+    segments = plan_segments(get_video_frame_count(video_path), fps, workers, keyframe_indices(video_path, fps))
+    warmup_frames = int(SCHEDULER_WARMUP_SECONDS * fps) if scheduler_options is not None else 0
+
+    pool = get_analysis_pool(workers, backend, model_path)
+    start_time = time.perf_counter()
+    results = [None] * len(segments)
+    try:
+        futures = {pool.submit(_analyze_segment, video_path, segment, batch_size, stride, scheduler_options, warmup_frames):
+                   index for index, segment in enumerate(segments)}
+        for done, future in enumerate(as_completed(futures), 1):
+            analysis = future.result()
+            results[futures[future]] = analysis
+            if profiler is not None:
+                profiler.record('analysis_segment', analysis['stats']['elapsed_seconds'])
+                profiler.increment('frames_analysed', analysis['stats']['frames_analysed'])
+            if on_progress is not None:
+                on_progress(done, len(segments))
+    except BrokenProcessPool:
+        _discard_pool()  # A worker died (e.g. out of memory); start fresh next time
+        raise
+    elapsed = time.perf_counter() - start_time
+
+    keypoints = np.concatenate([analysis['keypoints'] for analysis in results])
+    frame_indices = np.concatenate([analysis['frame_indices'] for analysis in results])
+    analysed = len(frame_indices)
+    return {
+        'keypoints': keypoints,
+        'frame_indices': frame_indices,
+        'timestamps': frame_indices / fps,
+        'fps': fps,
+        'stride': stride,
+        'stats': {
+            'frames_analysed': analysed,
+            'frames_skipped': sum(analysis['stats']['frames_skipped'] for analysis in results),
+            'elapsed_seconds': elapsed,
+            'inference_seconds': sum(analysis['stats']['inference_seconds'] for analysis in results),
+            'analysed_fps': analysed / elapsed if elapsed > 0 else 0.0,
+            'video_seconds_per_second': (frame_indices[-1] + 1) / fps / elapsed if analysed and elapsed > 0 else 0.0,
+            'segments': len(segments),
+            'workers': workers,
+        },
+    }
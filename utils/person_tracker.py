@@ -0,0 +1,152 @@
+# person_tracker.py
+
+import numpy as np
+
+from utils.angle_utils import NUM_KEYPOINTS
+from utils.keypoint_filter import KeypointFilter
+
+# Per-keypoint falloff of the COCO object keypoint similarity (nose ... ankles)
+_OKS_SIGMAS = np.array([.26, .25, .25, .35, .35, .79, .79, .72, .72, .62, .62,
+                        1.07, 1.07, .87, .87, .89, .89], dtype=np.float32) / 10.0
+
+
+class PersonSession:
+    """Everything analysed for one tracked person: their angle history, strategy state and feedback."""
+
+    def __init__(self, track_id, strategy, feedback_manager, joint_angle_data):
+        self.track_id = track_id
+        self.strategy = strategy
+        self.feedback_manager = feedback_manager
+        self.joint_angle_data = joint_angle_data
+        self.last_feedback_time = 0
+        self.feedback_message = None
+
+
+class Track:
+    """One person followed across frames. keypoints are smoothed by the track's own filter."""
+
+    def __init__(self, track_id, box, keypoints, timestamp, keypoint_filter, session=None):
+        self.id = track_id
+        self.box = box
+        self.box_velocity = np.zeros(4, dtype=np.float32)  # Pixels per second, smoothed
+        self.keypoint_filter = keypoint_filter
+        self.keypoints = keypoint_filter.update(keypoints, timestamp)
+        self.last_seen = timestamp
+        self.hits = 1
+        self.session = session
+
+
+def box_iou(boxes_a, boxes_b):
+    """(A, 4) x (B, 4) boxes (x1, y1, x2, y2) -> (A, B) intersection over union."""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:4], boxes_b[None, :, 2:4])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:4] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:4] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def keypoint_similarity(keypoints_a, keypoints_b, boxes_a, min_confidence=0.3):
+    """
+    (A, K, 3) x (B, K, 3) -> (A, B) COCO object keypoint similarity, using keypoints seen in both
+    and the scale of the `boxes_a` boxes. Still works when boxes barely overlap (fast movement).
+    """
+    distances = np.sum((keypoints_a[:, None, :, :2] - keypoints_b[None, :, :, :2]) ** 2, axis=3)
+    visible = (keypoints_a[:, None, :, 2] >= min_confidence) & (keypoints_b[None, :, :, 2] >= min_confidence)
+    area = np.prod(boxes_a[:, 2:4] - boxes_a[:, :2], axis=1)[:, None, None]
+    similarity = np.exp(-distances / (2 * np.maximum(area, 1.0) * (2 * _OKS_SIGMAS[:keypoints_a.shape[1]]) ** 2))
+    counts = visible.sum(axis=2)
+    return np.where(counts > 0, np.sum(similarity * visible, axis=2) / np.maximum(counts, 1), 0.0)
+
+
+class PersonTracker:
+    """
+    Gives every person in the camera feed a stable ID, from one pose result per frame.
+
+    Detections are associated with tracks greedily by similarity, where similarity is the larger
+    of box IoU and keypoint similarity (OKS). A pair must reach min_similarity to match.
+    Unmatched detections start new tracks. Unmatched tracks are bridged by their keypoint filter
+    and dropped after max_missed_seconds. session_factory(track_id), if given, is called once per
+    new track and its return value stored as track.session.
+    """
+
+    def __init__(self, min_similarity=0.3, max_missed_seconds=1.0, max_people=8,
+                 session_factory=None, keypoint_filter_factory=KeypointFilter):
+        self.min_similarity = min_similarity
+        self.max_missed_seconds = max_missed_seconds
+        self.max_people = max_people
+        self.session_factory = session_factory
+        self.keypoint_filter_factory = keypoint_filter_factory
+        self.tracks = []
+        self._next_id = 1
+
+    def _associate(self, boxes, keypoints, timestamp):
+        """Greedy matching against where each track should be now. Returns (track index, detection index) pairs."""
+        if not self.tracks or len(boxes) == 0:
+            return []
+        # Constant-velocity prediction keeps IDs apart when people cross paths
+        track_boxes = np.array([track.box + track.box_velocity * (timestamp - track.last_seen)
+                                for track in self.tracks], dtype=np.float32)
+        track_keypoints = np.stack([track.keypoint_filter.predict(timestamp) for track in self.tracks])
+        similarity = np.maximum(box_iou(track_boxes, boxes),
+                                keypoint_similarity(track_keypoints, keypoints, track_boxes))
+        matches = []
+        used_tracks, used_detections = set(), set()
+        for flat_index in np.argsort(-similarity, axis=None):
+            track_index, detection_index = np.unravel_index(flat_index, similarity.shape)
+            if similarity[track_index, detection_index] < self.min_similarity:
+                break
+            if track_index in used_tracks or detection_index in used_detections:
+                continue
+            matches.append((int(track_index), int(detection_index)))
+            used_tracks.add(track_index)
+            used_detections.add(detection_index)
+        return matches
+
+    def update(self, result, timestamp):
+        """
+        Feeds one frame's pose result (None = nothing detected).
+        Returns the tracks that have keypoints in this frame (seen, or bridged over a short gap).
+        """
+        if result is None or len(result) == 0:
+            boxes = np.zeros((0, 4), dtype=np.float32)
+            keypoints = np.zeros((0, NUM_KEYPOINTS, 3), dtype=np.float32)
+        else:
+            boxes = np.asarray(result.boxes, dtype=np.float32)[:, :4]
+            keypoints = np.asarray(result.keypoints, dtype=np.float32)
+
+        matches = self._associate(boxes, keypoints, timestamp)
+        matched_tracks = {track_index for track_index, _ in matches}
+        matched_detections = {detection_index for _, detection_index in matches}
+
+        for track_index, detection_index in matches:
+            track = self.tracks[track_index]
+            dt = timestamp - track.last_seen
+            if dt > 0:
+                track.box_velocity += 0.5 * ((boxes[detection_index] - track.box) / dt - track.box_velocity)
+            track.box = boxes[detection_index]
+            track.keypoints = track.keypoint_filter.update(keypoints[detection_index], timestamp)
+            track.last_seen = timestamp
+            track.hits += 1
+
+        for track_index, track in enumerate(self.tracks):
+            if track_index not in matched_tracks:
+                track.keypoints = track.keypoint_filter.update(None, timestamp)
+
+        # Forget people who left, then start tracks for new ones (most confident detections first)
+        self.tracks = [track for track in self.tracks if timestamp - track.last_seen <= self.max_missed_seconds]
+        for detection_index in range(len(boxes)):
+            if detection_index in matched_detections or len(self.tracks) >= self.max_people:
+                continue
+            track_id = self._next_id
+            self._next_id += 1
+            session = self.session_factory(track_id) if self.session_factory is not None else None
+            self.tracks.append(Track(track_id, boxes[detection_index], keypoints[detection_index], timestamp,
+                                     self.keypoint_filter_factory(), session))
+
+        return [track for track in self.tracks if track.keypoints is not None]
+
+    def reset(self):
+        self.tracks = []
+        self._next_id = 1
@@ -0,0 +1,186 @@
+# profiling_utils.py
+
+import cProfile
+import importlib.util
+import io
+import json
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import streamlit as st
+
+
+def available_capture_modes():
+    """Full-capture modes usable here: cProfile always, pyinstrument if it is installed."""
+    modes = ('cprofile',)
+    if importlib.util.find_spec('pyinstrument') is not None:
+        modes += ('pyinstrument',)
+    return modes
+
+
+class Profiler:
+    """
+    Lightweight per-session instrumentation.
+    - span(name): times a block and adds it to a rolling window for that stage
+    - increment(name) / set_gauge(name, value): counters and last-value gauges
+    - snapshot(): p50/p95/p99/mean per stage, plus counters and gauges
+    - to_json() / to_prometheus(): machine-readable exports
+    - start_capture() / stop_capture(): optional cProfile or pyinstrument capture
+    All methods are safe to call from the capture/inference threads.
+    """
+
+    def __init__(self, window=300, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._gauges = {}
+        self._capture = None
+        self._capture_mode = None
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]  # count, sum of seconds (all time)
+            self._samples[name].append(seconds)
+            self._totals[name][0] += 1
+            self._totals[name][1] += seconds
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self):
+        """Returns {'stages': {name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}, 'counters': ..., 'gauges': ...}."""
+        with self._lock:
+            samples = {name: np.fromiter(values, dtype=np.float64) for name, values in self._samples.items()}
+            totals = {name: list(total) for name, total in self._totals.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        stages = {}
+        for name, values in samples.items():
+            if len(values) == 0:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+            stages[name] = {
+                'count': totals[name][0],
+                'mean_ms': 1000 * float(values.mean()),
+                'p50_ms': float(p50),
+                'p95_ms': float(p95),
+                'p99_ms': float(p99),
+                'max_ms': 1000 * float(values.max()),
+            }
+        return {'stages': stages, 'counters': counters, 'gauges': gauges}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix='deezsquats'):
+        """Prometheus text exposition format (summary per stage, counters, gauges)."""
+        snapshot = self.snapshot()
+        with self._lock:
+            totals = {name: list(total) for name, total in self._totals.items()}
+
+        lines = [f"# TYPE {prefix}_stage_latency_seconds summary"]
+        for name, stats in snapshot['stages'].items():
+            for quantile in ('50', '95', '99'):
+                lines.append(f'{prefix}_stage_latency_seconds{{stage="{name}",quantile="0.{quantile}"}} '
+                             f"{stats[f'p{quantile}_ms'] / 1000:.6f}")
+            lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{name}"}} {totals[name][1]:.6f}')
+            lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{name}"}} {totals[name][0]}')
+        for name, value in snapshot['counters'].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, value in snapshot['gauges'].items():
+            if isinstance(value, (int, float)):
+                lines.append(f"# TYPE {prefix}_{name} gauge")
+                lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+            self._totals = {}
+            self._counters = {}
+            self._gauges = {}
+
+    def start_capture(self, mode='cprofile'):
+        """
+        Starts a full profiler capture of the calling thread ('cprofile' or 'pyinstrument') and returns
+        the mode used: without pyinstrument installed, it falls back to cProfile.
+        """
+        if mode == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler as PyinstrumentProfiler
+            except ImportError:
+                print("pyinstrument capture needs `pip install pyinstrument`; using cProfile instead")
+                mode = 'cprofile'
+        if mode == 'pyinstrument':
+            self._capture = PyinstrumentProfiler()
+        elif mode == 'cprofile':
+            self._capture = cProfile.Profile()
+        else:
+            raise ValueError(f"Capture mode {mode} is not supported")
+        self._capture_mode = mode
+        if mode == 'pyinstrument':
+            self._capture.start()
+        else:
+            self._capture.enable()
+        return mode
+
+    def stop_capture(self, limit=30):
+        """Stops the capture and returns a text report (None if no capture was running)."""
+        if self._capture is None:
+            return None
+        if self._capture_mode == 'pyinstrument':
+            self._capture.stop()
+            report = self._capture.output_text(unicode=True)
+        else:
+            self._capture.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._capture, stream=stream).sort_stats('cumulative').print_stats(limit)
+            report = stream.getvalue()
+        self._capture = None
+        self._capture_mode = None
+        return report
+
+
+def render_debug_panel(profiler, placeholder):
+    """Shows per-stage latency percentiles, counters and gauges in a Streamlit placeholder."""
+    snapshot = profiler.snapshot()
+    rows = [
+        {'stage': name, 'count': stats['count'], 'p50 ms': round(stats['p50_ms'], 1),
+         'p95 ms': round(stats['p95_ms'], 1), 'p99 ms': round(stats['p99_ms'], 1)}
+        for name, stats in sorted(snapshot['stages'].items(), key=lambda item: -item[1]['p50_ms'])
+    ]
+    extras = {**snapshot['counters'], **snapshot['gauges']}
+    with placeholder.container():
+        if rows:
+            st.table(rows)
+        if extras:
+            st.caption(" | ".join(f"{name}: {value}" for name, value in extras.items()))
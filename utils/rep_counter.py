@@ -0,0 +1,147 @@
+# rep_counter.py
+
+import math
+
+# Movement phases of a rep, for a joint angle that decreases when the joint bends
+EXTENDED = 'extended'    # Resting at (or turning around at) the open end, e.g. standing in a squat
+FLEXING = 'flexing'      # Angle decreasing, e.g. going down
+FLEXED = 'flexed'        # Turning around at the closed end, e.g. the bottom of the squat
+EXTENDING = 'extending'  # Angle increasing, e.g. coming back up
+PHASES = (EXTENDED, FLEXING, FLEXED, EXTENDING)
+
+
+class RepPhaseDetector:
+    """
+    Incremental rep counter and phase labeller over one joint angle signal (O(1) per frame).
+
+    The signal is smoothed with an exponential moving average and its velocity (degrees/s)
+    decides the phase, with hysteresis on both speed and amplitude:
+    - a movement starts when |velocity| rises above `start_speed`,
+    - it ends (a turning point: FLEXED or EXTENDED) when |velocity| drops below `stop_speed`,
+      but only if the angle travelled at least `min_range` degrees since the last turning point;
+      smaller wiggles fall back to the previous resting phase, so noise never flips phases.
+    A rep is counted when the signal comes back to EXTENDED after having been FLEXED.
+
+    update() returns the current phase. `turn` is set (for one update) once the turning point
+    before the current one is confirmed; it holds (phase, angle, values, timestamp) at that
+    turning point's extreme, which is where a phase's form rules should be judged.
+    """
+
+    def __init__(self, start_speed=35.0, stop_speed=12.0, min_range=25.0, smoothing_seconds=0.1):
+        self.start_speed = start_speed
+        self.stop_speed = stop_speed
+        self.min_range = min_range
+        self.smoothing_seconds = smoothing_seconds
+        self.reset()
+
+    def reset(self):
+        self.phase = EXTENDED
+        self.rep_count = 0
+        self.reps = []         # (start time, end time, smallest angle) per completed rep
+        self.turn = None       # (phase, extreme angle, values, timestamp) of the last confirmed turning point
+        self._value = None     # Smoothed angle
+        self._velocity = 0.0   # Smoothed degrees per second
+        self._time = None
+        self._turn_value = None          # Angle at the last turning point
+        self._extreme = None             # (angle, values, timestamp) at the extreme of the current turning point
+        self._pending_turn = None        # The turning point last left, until the movement is confirmed
+        self._rep_start = None
+        self._rep_bottom = None
+        self._flexed_this_rep = False
+
+    def update(self, value, timestamp, values=None):
+        """
+        Feeds one sample. value may be None/NaN (joint not detected): the phase is then held.
+        values is an optional payload (e.g. the whole angle row) kept for the turning point's extreme.
+        """
+        self.turn = None
+        if value is None or value != value:  # value != value: NaN
+            return self.phase
+
+        if self._value is None:
+            self._value = self._turn_value = value
+            self._time = timestamp
+            self._extreme = (value, values, timestamp)
+            return self.phase
+
+        dt = timestamp - self._time
+        if dt <= 0:
+            return self.phase
+        alpha = 1.0 - math.exp(-dt / self.smoothing_seconds) if self.smoothing_seconds > 0 else 1.0
+        previous = self._value
+        self._value += alpha * (value - self._value)
+        self._velocity += alpha * ((self._value - previous) / dt - self._velocity)
+        self._time = timestamp
+
+        if self.phase in (EXTENDED, FLEXED):
+            self._track_extreme(value, values, timestamp)
+            if self._velocity <= -self.start_speed:
+                self._leave_turning_point(FLEXING)
+            elif self._velocity >= self.start_speed:
+                self._leave_turning_point(EXTENDING)
+        elif self.phase == FLEXING:
+            if self._velocity > -self.stop_speed:
+                # Slowed down or reversed: a real bottom only if we went far enough
+                if self._turn_value - self._value >= self.min_range:
+                    self._enter_turning_point(FLEXED, value, values, timestamp)
+                else:
+                    self._enter_turning_point(EXTENDED, value, values, timestamp, resume=True)
+        elif self.phase == EXTENDING:
+            if self._velocity < self.stop_speed:
+                if self._value - self._turn_value >= self.min_range:
+                    self._enter_turning_point(EXTENDED, value, values, timestamp)
+                else:
+                    self._enter_turning_point(FLEXED, value, values, timestamp, resume=True)
+        return self.phase
+
+    def _track_extreme(self, value, values, timestamp):
+        # The extreme of a turning point: the smallest angle at the bottom, the largest at the top
+        if self._extreme is None or (value < self._extreme[0] if self.phase == FLEXED else value > self._extreme[0]):
+            self._extreme = (value, values, timestamp)
+
+    def _leave_turning_point(self, next_phase):
+        # Only reported once the next turning point confirms this was a real movement
+        self._pending_turn = (self.phase,) + self._extreme
+        if self.phase == EXTENDED and next_phase == FLEXING:
+            self._rep_start = self._time
+            self._rep_bottom = None
+            self._flexed_this_rep = False
+        elif self.phase == FLEXED and (self._rep_bottom is None or self._extreme[0] < self._rep_bottom):
+            self._rep_bottom = self._extreme[0]
+        self._turn_value = self._extreme[0]
+        self.phase = next_phase
+
+    def _enter_turning_point(self, phase, value, values, timestamp, resume=False):
+        self.phase = phase
+        if resume:
+            # The movement was too small to count: back to the turning point we came from
+            self._turn_value = self._pending_turn[1] if self._pending_turn else self._value
+            self._extreme = self._pending_turn[1:] if self._pending_turn else (value, values, timestamp)
+            self._track_extreme(value, values, timestamp)
+            return
+        self.turn = self._pending_turn
+        self._pending_turn = None
+        self._turn_value = self._value
+        self._extreme = (value, values, timestamp)
+        if phase == FLEXED:
+            self._flexed_this_rep = True
+        elif self._flexed_this_rep:
+            self.rep_count += 1
+            self.reps.append((self._rep_start, timestamp, self._rep_bottom))
+            self._flexed_this_rep = False
+
+    @property
+    def velocity(self):
+        return self._velocity
+
+
+def mean_angle(values, indices):
+    """Mean of the detected (non-NaN) angles at `indices` in an angle row, or NaN if none were detected."""
+    total = 0.0
+    count = 0
+    for index in indices:
+        value = values[index]
+        if value == value:  # Not NaN
+            total += value
+            count += 1
+    return total / count if count else math.nan
@@ -0,0 +1,122 @@
+# roi_inference.py
+
+import numpy as np
+
+from yolo_model.backends import PoseResult
+
+
+class RoiPoseModel:
+    """
+    Wraps a pose model (backend or inference server) for one live stream that follows one person.
+
+    Every `full_frame_interval` frames the whole frame is searched. In between, only a crop around
+    the last pose (padded by `padding` times its size on each side) is inferred, at the smaller
+    `roi_imgsz` input size, and the keypoints are mapped back to frame coordinates. If the crop
+    finds nobody, or the person's confidence drops below `min_confidence` or fewer than
+    `min_keypoints` keypoints are visible, the same frame is re-run on the full frame.
+    Crops covering more than `max_crop_fraction` of the frame are not worth it and use the full frame.
+
+    Has the same predict(frames) method as a PoseBackend and returns PoseResults in frame
+    coordinates (the person from the crop only), so it can be used wherever a model is expected.
+    `last_imgsz` is the input size the last frame was finally inferred at (the crop's or the full
+    frame's), so latency can be attributed to the size that actually ran.
+    """
+
+    def __init__(self, model, full_frame_interval=30, roi_imgsz=320, padding=0.25, min_confidence=0.5,
+                 min_keypoints=8, keypoint_confidence=0.3, max_crop_fraction=0.6, profiler=None):
+        self.model = model
+        self.full_frame_interval = full_frame_interval
+        self.roi_imgsz = roi_imgsz
+        self.padding = padding
+        self.min_confidence = min_confidence
+        self.min_keypoints = min_keypoints
+        self.keypoint_confidence = keypoint_confidence
+        self.max_crop_fraction = max_crop_fraction
+        self.profiler = profiler
+        self.reset()
+
+    def reset(self):
+        self._roi = None                  # (x1, y1, x2, y2) of the person in the last frame, or None
+        self._frames_since_full = 0
+        self.last_imgsz = None
+        self.counts = {'full_frame': 0, 'crop': 0, 'fallback': 0}
+
+    def predict(self, frames, imgsz=None):
+        # Frames of one stream depend on each other, so they are processed in order
+        return [self._predict_one(frame, imgsz) for frame in frames]
+
+    def __call__(self, frames, imgsz=None):
+        return self.predict(frames, imgsz)
+
+    def _count(self, name):
+        self.counts[name] += 1
+        if self.profiler is not None:
+            self.profiler.increment(f'roi_{name}')
+
+    def _predict_one(self, frame, imgsz=None):
+        crop_box = None
+        if self._roi is not None and self._frames_since_full < self.full_frame_interval:
+            crop_box = self._crop_box(frame.shape)
+
+        if crop_box is not None:
+            x1, y1, x2, y2 = crop_box
+            crop = np.ascontiguousarray(frame[y1:y2, x1:x2])
+            crop_imgsz = min(self.roi_imgsz, imgsz or self.roi_imgsz)
+            result = self.model.predict([crop], crop_imgsz)[0]
+            if self._is_confident(result):
+                self._count('crop')
+                self.last_imgsz = crop_imgsz
+                self._frames_since_full += 1
+                result = self._to_frame(result, frame, x1, y1)
+                self._roi = self._person_box(result)
+                return result
+            self._count('fallback')
+
+        result = self.model.predict([frame], imgsz)[0]
+        self._count('full_frame')
+        self.last_imgsz = imgsz
+        self._frames_since_full = 0
+        self._roi = self._person_box(result) if self._is_confident(result) else None
+        return result
+
+    def _is_confident(self, result):
+        if result is None or len(result) == 0:
+            return False
+        # Results are sorted most confident person first
+        visible = int(np.count_nonzero(result.keypoints[0, :, 2] >= self.keypoint_confidence))
+        return float(result.boxes[0, 4]) >= self.min_confidence and visible >= self.min_keypoints
+
+    def _person_box(self, result):
+        """Bounds of the most confident person: their box joined with their visible keypoints."""
+        keypoints = result.keypoints[0]
+        visible = keypoints[keypoints[:, 2] >= self.keypoint_confidence, :2]
+        x1, y1, x2, y2 = (float(v) for v in result.boxes[0, :4])
+        if len(visible):
+            x1, y1 = min(x1, float(visible[:, 0].min())), min(y1, float(visible[:, 1].min()))
+            x2, y2 = max(x2, float(visible[:, 0].max())), max(y2, float(visible[:, 1].max()))
+        return x1, y1, x2, y2
+
+    def _crop_box(self, frame_shape):
+        """Padded integer crop around the last ROI, clipped to the frame (None if a crop isn't worth it)."""
+        height, width = frame_shape[:2]
+        x1, y1, x2, y2 = self._roi
+        pad = self.padding * max(x2 - x1, y2 - y1, 1.0)
+        x1, y1 = int(max(x1 - pad, 0)), int(max(y1 - pad, 0))
+        x2, y2 = int(min(x2 + pad, width)), int(min(y2 + pad, height))
+        if x2 - x1 < 16 or y2 - y1 < 16:
+            return None
+        if (x2 - x1) * (y2 - y1) > self.max_crop_fraction * width * height:
+            return None
+        return x1, y1, x2, y2
+
+    def _to_frame(self, result, frame, x_offset, y_offset):
+        """Moves the crop's most confident person into frame coordinates."""
+        keypoints = result.keypoints[:1].copy()
+        boxes = result.boxes[:1].copy()
+        # Keypoints at (0, 0) are misses and stay that way
+        detected = np.any(keypoints[..., :2] != 0, axis=-1)
+        keypoints[..., 0] = np.where(detected, keypoints[..., 0] + x_offset, 0.0)
+        keypoints[..., 1] = np.where(detected, keypoints[..., 1] + y_offset, 0.0)
+        boxes[:, [0, 2]] += x_offset
+        boxes[:, [1, 3]] += y_offset
+        return PoseResult(keypoints, boxes, frame)
@@ -0,0 +1,215 @@
+# video_pipeline.py
+
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from utils.angle_utils import NUM_KEYPOINTS
+from utils.model_utils import get_keypoints_from_batch
+
+_END_OF_STREAM = object()
+
+
+def compute_stride(source_fps, target_fps=None, stride=1):
+    """
+    Returns how many decoded frames to advance per analysed frame.
+    target_fps (if given) takes precedence over a fixed stride.
+    """
+    if target_fps and source_fps and target_fps < source_fps:
+        return max(1, int(round(source_fps / target_fps)))
+    return max(1, int(stride))
+
+
+class FrameReader(threading.Thread):
+    """
+    Decodes a video on a background thread and hands every `stride`-th frame to the
+    consumer through a bounded queue, so decoding overlaps with inference.
+    Skipped frames are only grabbed (not decoded into a BGR image).
+    start/end (frame indices, end exclusive) limit decoding to a segment of the video; the stride
+    stays aligned to frame 0, so segments pick the same frames as one pass over the whole video.
+    """
+
+    def __init__(self, video_path, stride=1, max_queue=64, start=0, end=None):
+        super().__init__(daemon=True)
+        self.video_path = video_path
+        self.stride = max(1, int(stride))
+        self.start_frame = max(0, int(start))
+        self.end_frame = end
+        self.frames = queue.Queue(maxsize=max_queue)
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            frame_index = self.start_frame
+            if frame_index:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            while not self._stop_event.is_set() and (self.end_frame is None or frame_index < self.end_frame):
+                if frame_index % self.stride == 0:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    self._put((frame_index, frame))
+                elif not cap.grab():
+                    break
+                frame_index += 1
+        except Exception as e:
+            self.error = e
+        finally:
+            cap.release()
+            self._put(_END_OF_STREAM)
+
+    def _put(self, item):
+        # Block while the consumer is busy, but give up if we've been stopped
+        while not self._stop_event.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def stop(self):
+        self._stop_event.set()
+
+    def __iter__(self):
+        while True:
+            item = self.frames.get()
+            if item is _END_OF_STREAM:
+                break
+            yield item
+        if self.error is not None:
+            raise self.error
+
+
+def iter_batches(items, batch_size):
+    """Groups an iterable into lists of at most batch_size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def schedule_frames(items, scheduler, fps, skipped, start_frame=0):
+    """
+    Passes on only the (frame_index, frame) items the scheduler wants inferred; counts the rest in skipped[0].
+    Frames before start_frame only warm up the scheduler: its motion estimate, and its inference
+    cadence (they go through should_infer() with the answer thrown away).
+    """
+    for frame_index, frame in items:
+        scheduler.observe(frame)
+        if frame_index < start_frame:
+            scheduler.should_infer(frame_index / fps)
+            continue
+        if scheduler.should_infer(frame_index / fps):
+            yield frame_index, frame
+        else:
+            skipped[0] += 1
+
+
+def get_video_fps(video_path, default=30.0):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or default
+    cap.release()
+    return fps
+
+
+def get_video_frame_count(video_path):
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return max(frame_count, 0)
+
+
+def analyze_video(video_path, model, batch_size=8, stride=1, target_fps=None,
+                  preview_every=0, on_preview=None, profiler=None, scheduler=None,
+                  start_frame=0, end_frame=None, warmup_frames=0):
+    """
+    Offline analysis of an uploaded video.
+    Frames are decoded on a background thread, subsampled by stride/target_fps and sent
+    to YOLO in batches. If a scheduler (InferenceScheduler) is given, it thins the subsampled
+    frames further wherever there is little motion. on_preview(frame, result) is called for every
+    `preview_every`-th analysed frame (0 disables previews). If a profiler is given, per-batch
+    inference time and the time spent waiting on the decoder are recorded on it.
+    start_frame/end_frame restrict the analysis to a segment (see utils/parallel_analysis.py); with a
+    scheduler, the `warmup_frames` before start_frame are decoded to prime its motion estimate.
+
+    Returns a dict with:
+        keypoints:     (N, K, 3) float32 keypoints of the first person per analysed frame
+        frame_indices: (N,) index of each analysed frame in the source video
+        timestamps:    (N,) time of each analysed frame in seconds
+        fps:           source frame rate
+        stride:        frames advanced per analysed frame
+        stats:         throughput numbers for the run
+    """
+    fps = get_video_fps(video_path)
+    stride = compute_stride(fps, target_fps, stride)
+
+    read_from = max(0, start_frame - warmup_frames) if scheduler is not None else start_frame
+    reader = FrameReader(video_path, stride=stride, max_queue=max(2 * batch_size, 16), start=read_from, end=end_frame)
+    reader.start()
+    skipped = [0]
+    frames_to_analyse = reader if scheduler is None else schedule_frames(reader, scheduler, fps, skipped, start_frame)
+
+    keypoint_batches = []
+    frame_indices = []
+    inference_time = 0.0
+    start_time = time.perf_counter()
+    analysed = 0
+    wait_start = time.perf_counter()
+    try:
+        for batch in iter_batches(frames_to_analyse, batch_size):
+            if profiler is not None:
+                profiler.record('decode_wait', time.perf_counter() - wait_start)
+            indices = [frame_index for frame_index, _ in batch]
+            frames = [frame for _, frame in batch]
+
+            inference_start = time.perf_counter()
+            keypoints, results = get_keypoints_from_batch(frames, model)
+            batch_seconds = time.perf_counter() - inference_start
+            inference_time += batch_seconds
+            if profiler is not None:
+                profiler.record('inference_batch', batch_seconds)
+                profiler.increment('frames_analysed', len(frames))
+
+            keypoint_batches.append(keypoints)
+            frame_indices.extend(indices)
+
+            if on_preview is not None and preview_every:
+                for offset, (frame, result) in enumerate(zip(frames, results)):
+                    if (analysed + offset) % preview_every == 0:
+                        on_preview(frame, result)
+            analysed += len(frames)
+            wait_start = time.perf_counter()
+    finally:
+        reader.stop()
+
+    elapsed = time.perf_counter() - start_time
+    if keypoint_batches:
+        keypoints = np.concatenate(keypoint_batches)
+    else:
+        keypoints = np.zeros((0, NUM_KEYPOINTS, 3), dtype=np.float32)
+    frame_indices = np.asarray(frame_indices, dtype=np.int64)
+
+    return {
+        'keypoints': keypoints,
+        'frame_indices': frame_indices,
+        'timestamps': frame_indices / fps,
+        'fps': fps,
+        'stride': stride,
+        'stats': {
+            'frames_analysed': analysed,
+            'frames_skipped': skipped[0],
+            'elapsed_seconds': elapsed,
+            'inference_seconds': inference_time,
+            'analysed_fps': analysed / elapsed if elapsed > 0 else 0.0,
+            'video_seconds_per_second': (frame_indices[-1] + 1 - start_frame) / fps / elapsed if analysed and elapsed > 0 else 0.0,
+        },
+    }
@@ -1,20 +1,171 @@
 import cv2
+import hashlib
+import math
+import os
+import tempfile
+import time
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")  # Render off-screen; Streamlit only needs the image
 import matplotlib.pyplot as plt
+import pandas as pd
 import streamlit as st
 
-def save_video(uploaded_video):
-    """Saves the uploaded video to a temporary file."""
-    video_path = f"temp_video.{uploaded_video.name.split('.')[-1]}"
-    with open(video_path, "wb") as f:
-        f.write(uploaded_video.read())
-    return video_path
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', tempfile.gettempdir())
+MAX_UPLOAD_BYTES = int(float(os.environ.get('MAX_UPLOAD_MB', 1024)) * 1024 * 1024)
+UPLOAD_PREFIX = 'deezsquats_upload_'
+# Uploads left behind by sessions that died mid-analysis are deleted after this long
+STALE_UPLOAD_SECONDS = 6 * 60 * 60
+
+class SavedVideo:
+    """
+    An upload written to its own temporary file, with the SHA-256 of its contents (computed while
+    writing, so the keypoint cache doesn't read the file again). Deletes the file on cleanup() or
+    when used as a context manager.
+    """
+
+    def __init__(self, path, digest, size):
+        self.path = path
+        self.digest = digest
+        self.size = size
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+def _upload_chunks(uploaded_video, chunk_size):
+    """The upload's bytes in chunks, as views of its buffer when it has one (no copies)."""
+    getbuffer = getattr(uploaded_video, 'getbuffer', None)
+    if getbuffer is not None:
+        # Streamlit keeps uploads in memory (UploadedFile is a BytesIO): slice its buffer instead of read()
+        view = getbuffer()
+        try:
+            for start in range(0, len(view), chunk_size):
+                yield view[start:start + chunk_size]
+        finally:
+            view.release()
+        return
+    uploaded_video.seek(0)
+    for chunk in iter(lambda: uploaded_video.read(chunk_size), b''):
+        yield chunk
+
+def _too_large_error(size, max_bytes):
+    return ValueError(f"The video is {size / 2**20:.0f} MB; uploads are limited to {max_bytes / 2**20:.0f} MB.")
+
+def cleanup_stale_uploads(directory=UPLOAD_DIR, max_age=STALE_UPLOAD_SECONDS):
+    """Deletes upload files older than max_age seconds (left behind by sessions that ended abruptly)."""
+    cutoff = time.time() - max_age
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith(UPLOAD_PREFIX):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass  # Removed by another session meanwhile
+
+def spool_upload(uploaded_video, directory=UPLOAD_DIR, max_bytes=MAX_UPLOAD_BYTES, chunk_size=1024 * 1024):
+    """
+    Streams an uploaded video to a uniquely named temporary file in chunks, hashing it on the way,
+    so concurrent sessions never share a file and memory doesn't grow with the video's size.
+    Raises ValueError for uploads larger than max_bytes. Returns a SavedVideo.
+    """
+    size = getattr(uploaded_video, 'size', None)
+    if max_bytes and size is not None and size > max_bytes:
+        raise _too_large_error(size, max_bytes)
+    cleanup_stale_uploads(directory)
+
+    extension = os.path.splitext(getattr(uploaded_video, 'name', '') or '')[1].lower() or '.mp4'
+    descriptor, path = tempfile.mkstemp(prefix=UPLOAD_PREFIX, suffix=extension, dir=directory)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            for chunk in _upload_chunks(uploaded_video, chunk_size):
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise _too_large_error(written, max_bytes)
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return SavedVideo(path, digest.hexdigest(), written)
 
 def plot_joint_angles(joint_angles, joint_name):
     """Plots the joint angles for a specific joint over time."""
-    plt.figure()
+    fig = plt.figure()
     plt.plot(joint_angles, label=f"{joint_name} Angle")
     plt.xlabel("Frame Number")
     plt.ylabel("Angle (degrees)")
     plt.title(f"{joint_name} Angle Over Time")
     plt.legend()
-    st.pyplot(plt)
+    st.pyplot(fig)
+    plt.close(fig)  # Don't leak one figure per call across reruns
+
+def minmax_decimate(x, y, max_points):
+    """
+    Reduces a series to at most max_points points while keeping its peaks: the series is split
+    into max_points / 2 buckets and each bucket contributes its minimum and maximum, in time order.
+    NaN gaps (joint not detected) are preserved as NaN.
+    """
+    n = len(y)
+    if n <= max_points:
+        return x, y
+    buckets = max(1, max_points // 2)
+    bucket_size = math.ceil(n / buckets)
+    padded = np.full(buckets * bucket_size, np.nan, dtype=np.float64)
+    padded[:n] = y
+    rows = padded.reshape(buckets, bucket_size)
+    missing = np.isnan(rows)
+    offsets = np.arange(buckets) * bucket_size
+    index_min = np.where(missing, np.inf, rows).argmin(axis=1) + offsets
+    index_max = np.where(missing, -np.inf, rows).argmax(axis=1) + offsets
+    order = np.column_stack((np.minimum(index_min, index_max), np.maximum(index_min, index_max))).ravel()
+    order = np.minimum(order, n - 1)
+    decimated = padded[order]
+    decimated[missing.all(axis=1).repeat(2)] = np.nan
+    return np.asarray(x)[order], decimated
+
+def plot_joint_summary(joint_series, max_points=1000):
+    """
+    Plots every joint with data from a JointSeriesStore as one interactive chart, drawn in the
+    browser from the (decimated) arrays so server-side cost doesn't grow with session length.
+    """
+    names = [name for name in joint_series.names if joint_series.has_data(name)]
+    if not names:
+        st.write("No joint angles were detected.")
+        return
+
+    timestamps = joint_series.timestamps()
+    elapsed = timestamps - timestamps[0]
+    values = joint_series.values()
+
+    times, angles, joints = [], [], []
+    for name in names:
+        x, y = minmax_decimate(elapsed, values[:, joint_series.index[name]], max_points)
+        times.append(x)
+        angles.append(y)
+        joints.append(np.full(len(x), name, dtype=object))
+    chart_data = pd.DataFrame({
+        "Time (s)": np.concatenate(times),
+        "Angle (degrees)": np.concatenate(angles),
+        "Joint": np.concatenate(joints),
+    })
+    st.line_chart(chart_data, x="Time (s)", y="Angle (degrees)", color="Joint")
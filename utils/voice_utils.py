@@ -6,16 +6,31 @@ import io
 import requests
 import streamlit as st
 import base64
+import mmap
+import struct
+import threading
+import queue
+import tempfile
+import time
+from collections import OrderedDict
 
 # Path to the mapping file
 MAPPING_FILE = 'feedback_audio_map.json'
 # Directory to store audio files
 AUDIO_DIR = 'voice'
+# Pre-synthesized clips for every strategy message, built by utils/build_audio_bundle.py
+BUNDLE_FILE = os.path.join(AUDIO_DIR, 'feedback_audio.bundle')
+BUNDLE_MAGIC = b'DZAB'
 
 class ElevenLabsTextToSpeech:
-    def __init__(self, api_key):
+    file_extension = "mp3"
+
+    def __init__(self, api_key, base_url="https://api.elevenlabs.io/v1", timeout=(3.05, 15)):
         self.api_key = api_key
-        self.base_url = "https://api.elevenlabs.io/v1"
+        self.base_url = base_url
+        self.timeout = timeout  # (connect, read) seconds
+        # One pooled session so repeated requests reuse the TLS connection
+        self.session = requests.Session()
         self.headers = {
             "Accept": "audio/mpeg",
             "Content-Type": "application/json",
@@ -36,12 +51,47 @@ class ElevenLabsTextToSpeech:
                 "similarity_boost": 0.5
             }
         }
-        response = requests.post(endpoint, json=data, headers=self.headers)
+        response = self.session.post(endpoint, json=data, headers=self.headers, timeout=self.timeout)
         if response.status_code == 200:
             return io.BytesIO(response.content)
         else:
             raise Exception(f"Speech synthesis failed: {response.text}")
 
+class Pyttsx3TextToSpeech:
+    """Offline speech synthesis with pyttsx3 (espeak/SAPI/NSSpeech). Produces WAV audio."""
+
+    file_extension = "wav"
+
+    def __init__(self, rate=170):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', rate)
+
+    def synthesize_speech(self, text):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "speech.wav")
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+            with open(path, "rb") as f:
+                return io.BytesIO(f.read())
+
+def create_tts_backend(name=None, api_key=None):
+    """
+    Creates the speech synthesis backend named by `name` or the TTS_BACKEND environment variable:
+    'elevenlabs' (default; ELEVENLABS_BASE_URL can point it at a stub server) or 'pyttsx3'.
+    The ElevenLabs key comes from `api_key`, ELEVENLABS_API_KEY or st.secrets (read it from the
+    Streamlit script thread).
+    """
+    name = name or os.environ.get('TTS_BACKEND', 'elevenlabs')
+    if name == 'pyttsx3':
+        return Pyttsx3TextToSpeech()
+    if name == 'elevenlabs':
+        api_key = api_key or os.environ.get('ELEVENLABS_API_KEY') or st.secrets["elevenlabs_api_key"]
+        if not api_key:
+            raise ValueError("ElevenLabs API key is not set.")
+        return ElevenLabsTextToSpeech(api_key, base_url=os.environ.get('ELEVENLABS_BASE_URL', "https://api.elevenlabs.io/v1"))
+    raise ValueError(f"TTS backend {name} is not supported")
+
 def load_feedback_audio_map():
     if os.path.exists(MAPPING_FILE):
         with open(MAPPING_FILE, 'r') as f:
@@ -59,66 +109,289 @@ def sanitize_filename(text):
     sanitized = "".join(c for c in sanitized if c.isalnum() or c in ('_',))
     return sanitized[:50]  # Limit filename length
 
+def audio_mime_type(audio_file):
+    return "audio/wav" if audio_file.endswith(".wav") else "audio/mp3"
+
+class AudioBundle:
+    """
+    Read-only view of a packed audio bundle: BUNDLE_MAGIC, a little-endian uint32 index length,
+    a JSON index {feedback: [offset, length, extension]} and the concatenated clips.
+    The file is memory-mapped, so opening it costs one index parse and clips are paged in on demand.
+    """
+
+    def __init__(self, path=BUNDLE_FILE):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:4] != BUNDLE_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not an audio bundle")
+        (index_length,) = struct.unpack('<I', self._mmap[4:8])
+        self.index = json.loads(self._mmap[8:8 + index_length].decode('utf-8'))
+        self._data_start = 8 + index_length
+
+    def __contains__(self, feedback):
+        return feedback in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, feedback):
+        """Returns (audio bytes, mime type) for a message, or None if it is not in the bundle."""
+        entry = self.index.get(feedback)
+        if entry is None:
+            return None
+        offset, length, extension = entry
+        start = self._data_start + offset
+        return self._mmap[start:start + length], audio_mime_type(f".{extension}")
+
+    def close(self):
+        self._mmap.close()
+
+def write_audio_bundle(clips, path=BUNDLE_FILE):
+    """Packs {feedback: (audio bytes, extension)} into a bundle file at `path`."""
+    index = {}
+    offset = 0
+    for feedback, (data, extension) in clips.items():
+        index[feedback] = [offset, len(data), extension]
+        offset += len(data)
+    header = json.dumps(index).encode('utf-8')
+    # Write to a temporary file first so a running app never maps a half-written bundle
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'wb') as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for data, _ in clips.values():
+            f.write(data)
+    os.replace(temporary_path, path)
+    return path
+
+class AudioCache:
+    """
+    Process-wide cache of feedback audio, so the frame loop never touches disk.
+    - The feedback -> file map is loaded once and only re-read when MAPPING_FILE's mtime changes
+      (checked at most every `check_interval` seconds).
+    - Clips are base64-encoded once and kept in an LRU keyed by feedback message.
+    - Messages in the pre-built audio bundle (if present) are served from it first; the mapping
+      file only covers clips synthesized after the bundle was built.
+    """
+
+    def __init__(self, mapping_file=MAPPING_FILE, max_entries=64, check_interval=2.0, bundle_file=BUNDLE_FILE):
+        self.mapping_file = mapping_file
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.bundle = None
+        if bundle_file and os.path.exists(bundle_file):
+            try:
+                self.bundle = AudioBundle(bundle_file)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring audio bundle {bundle_file}: {e}")
+        self._lock = threading.Lock()
+        self._payloads = OrderedDict()  # feedback -> (audio file, base64 payload, mime type)
+        self._audio_map = {}
+        self._map_mtime = None
+        self._last_check = 0.0
+        self._refresh_map(force=True)
+
+    def _refresh_map(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.mapping_file)
+        except OSError:
+            mtime = None
+        if force or mtime != self._map_mtime:
+            self._map_mtime = mtime
+            self._audio_map = load_feedback_audio_map()
+            # Drop payloads whose message now points at a different file
+            for feedback, (audio_file, _, _) in list(self._payloads.items()):
+                if audio_file is not None and self._audio_map.get(feedback) != audio_file:
+                    del self._payloads[feedback]
+
+    def _store(self, feedback, audio_file, payload, mime_type):
+        self._payloads[feedback] = (audio_file, payload, mime_type)
+        self._payloads.move_to_end(feedback)
+        while len(self._payloads) > self.max_entries:
+            self._payloads.popitem(last=False)
+
+    def get_clip(self, feedback):
+        """Returns (base64 payload, mime type) for a feedback message, or None if it has no audio yet."""
+        with self._lock:
+            self._refresh_map()
+            cached = self._payloads.get(feedback)
+            if cached is not None:
+                self._payloads.move_to_end(feedback)
+                return cached[1], cached[2]
+            clip = self.bundle.get(feedback) if self.bundle is not None else None
+            if clip is not None:
+                # audio_file None marks bundle clips, which mapping file changes don't invalidate
+                audio_file, (data, mime_type) = None, clip
+            else:
+                audio_file = self._audio_map.get(feedback)
+                if not audio_file or not os.path.exists(audio_file):
+                    return None
+                with open(audio_file, "rb") as f:
+                    data = f.read()
+                mime_type = audio_mime_type(audio_file)
+            payload = base64.b64encode(data).decode()
+            self._store(feedback, audio_file, payload, mime_type)
+            return payload, mime_type
+
+    def get_payload(self, feedback):
+        """Returns the base64 audio payload for a feedback message, or None if it has no audio yet."""
+        clip = self.get_clip(feedback)
+        return clip[0] if clip is not None else None
+
+    def add(self, feedback, audio_file, data):
+        """Registers newly synthesized audio (raw bytes) and persists the mapping."""
+        with self._lock:
+            self._audio_map[feedback] = audio_file
+            save_feedback_audio_map(self._audio_map)
+            self._map_mtime = os.path.getmtime(self.mapping_file)
+            payload = base64.b64encode(data).decode()
+            self._store(feedback, audio_file, payload, audio_mime_type(audio_file))
+            return payload
+
+    def preload(self):
+        """Encodes every mapped clip up front (bounded by max_entries)."""
+        for feedback in list(self._audio_map)[:self.max_entries]:
+            self.get_payload(feedback)
+
+
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_audio_cache():
+    """Returns the process-wide AudioCache, creating and preloading it on first use."""
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+            _audio_cache.preload()
+    return _audio_cache
+
+class TTSWorker:
+    """
+    Synthesizes missing feedback audio on a background thread so the video loop never waits on TTS.
+    Requests for text that is already queued are ignored, and failed texts are not retried for
+    `retry_after` seconds. Finished clips are written to AUDIO_DIR and added to the AudioCache.
+    """
+
+    def __init__(self, backend, audio_cache, retry_after=60.0):
+        self.backend = backend
+        self.audio_cache = audio_cache
+        self.retry_after = retry_after
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._failed = {}  # text -> time of the last failure
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def request(self, text):
+        """Queues `text` for synthesis unless it is already pending or recently failed."""
+        with self._lock:
+            if text in self._pending:
+                return
+            failed_at = self._failed.get(text)
+            if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+                return
+            self._pending.add(text)
+        self._requests.put(text)
+
+    def is_pending(self, text):
+        with self._lock:
+            return text in self._pending
+
+    def _run(self):
+        while True:
+            text = self._requests.get()
+            try:
+                audio_stream = self.backend.synthesize_speech(text)
+                extension = getattr(self.backend, 'file_extension', 'mp3')
+                audio_filename = os.path.join(AUDIO_DIR, f"{sanitize_filename(text)}.{extension}")
+                os.makedirs(os.path.dirname(audio_filename), exist_ok=True)
+                with open(audio_filename, 'wb') as f:
+                    f.write(audio_stream.getvalue())
+                self.audio_cache.add(text, audio_filename, audio_stream.getvalue())
+            except Exception as e:
+                print(f"Error generating audio for feedback: {text}. Error: {str(e)}")
+                with self._lock:
+                    self._failed[text] = time.monotonic()
+            finally:
+                with self._lock:
+                    self._pending.discard(text)
+
+
+_tts_worker = None
+_tts_worker_lock = threading.Lock()
+
+
+def get_tts_worker():
+    """Returns the process-wide TTSWorker, creating it (and its speech backend) on first use."""
+    global _tts_worker
+    with _tts_worker_lock:
+        if _tts_worker is None:
+            _tts_worker = TTSWorker(create_tts_backend(), get_audio_cache())
+    return _tts_worker
+
+def autoplay_audio_payload(b64: str, placeholder, mime_type="audio/mp3"):
+    md = f"""
+        <audio autoplay loop>
+            <source src="data:{mime_type};base64,{b64}" type="{mime_type}">
+        </audio>
+        """
+    placeholder.markdown(md, unsafe_allow_html=True)
+
 def autoplay_audio(file_path: str, placeholder):
     with open(file_path, "rb") as f:
-        data = f.read()
-        b64 = base64.b64encode(data).decode()
-        md = f"""
-            <audio autoplay loop>
-                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-            </audio>
-            """
-    placeholder.markdown(md, unsafe_allow_html=True)
+        b64 = base64.b64encode(f.read()).decode()
+    autoplay_audio_payload(b64, placeholder, audio_mime_type(file_path))
 
 def play_audio_feedback(feedback):
     if 'audio_placeholder' not in st.session_state:
         st.session_state['audio_placeholder'] = st.empty()
     if 'last_played_audio' not in st.session_state:
         st.session_state['last_played_audio'] = None
+    if 'audio_pending' not in st.session_state:
+        st.session_state['audio_pending'] = False
 
     # If feedback is None or empty, stop any playing audio
     if not feedback:
         if st.session_state['last_played_audio'] is not None:
             st.session_state['audio_placeholder'].empty()
             st.session_state['last_played_audio'] = None
+            st.session_state['audio_pending'] = False
         return
 
+    audio_cache = get_audio_cache()
+
     # If feedback has changed, update the audio
     if feedback != st.session_state['last_played_audio']:
         st.session_state['audio_placeholder'].empty()
-        # Get or generate the audio file for the feedback
-        feedback_audio_map = load_feedback_audio_map()
-        audio_file = feedback_audio_map.get(feedback)
-
-        if not audio_file or not os.path.exists(audio_file):
-            # Generate the audio file using ElevenLabs API
+        st.session_state['last_played_audio'] = feedback
+        clip = audio_cache.get_clip(feedback)
+        if clip is None:
+            # No audio yet: the on-screen text is shown on its own while the audio is synthesized
+            st.session_state['audio_pending'] = True
             try:
-                API_KEY = st.secrets["elevenlabs_api_key"]
-                if not API_KEY:
-                    st.write("Error: ElevenLabs API key is not set.")
-                    return
-                tts = ElevenLabsTextToSpeech(API_KEY)
-                # Generate the audio
-                audio_stream = tts.synthesize_speech(feedback)
-                # Save the audio file
-                sanitized_feedback = sanitize_filename(feedback)
-                audio_filename = os.path.join(AUDIO_DIR, f"{sanitized_feedback}.mp3")
-                os.makedirs(os.path.dirname(audio_filename), exist_ok=True)
-                with open(audio_filename, 'wb') as f:
-                    f.write(audio_stream.getvalue())
-                # Update the mapping
-                feedback_audio_map[feedback] = audio_filename
-                save_feedback_audio_map(feedback_audio_map)
+                get_tts_worker().request(feedback)
             except Exception as e:
                 st.write(f"Error generating audio for feedback: {feedback}. Error: {str(e)}")
-                return
-        else:
-            # Audio file exists
-            audio_filename = audio_file
-
+            return
+        st.session_state['audio_pending'] = False
         # Play the audio on loop
-        autoplay_audio(audio_filename, st.session_state['audio_placeholder'])
-        st.session_state['last_played_audio'] = feedback
+        autoplay_audio_payload(clip[0], st.session_state['audio_placeholder'], clip[1])
+    elif st.session_state['audio_pending']:
+        # Same feedback still showing: swap in the audio as soon as it is ready
+        clip = audio_cache.get_clip(feedback)
+        if clip is not None:
+            st.session_state['audio_pending'] = False
+            autoplay_audio_payload(clip[0], st.session_state['audio_placeholder'], clip[1])
     else:
         # Feedback is the same, do nothing (audio continues to loop)
         pass
@@ -0,0 +1,166 @@
+# webrtc_stream.py
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+DEFAULT_ICE_SERVERS = [{'urls': ['stun:stun.l.google.com:19302']}]
+
+
+def ice_servers():
+    """ICE (STUN/TURN) servers for WebRTC, as JSON in WEBRTC_ICE_SERVERS (a TURN server is needed behind strict NATs)."""
+    configured = os.environ.get('WEBRTC_ICE_SERVERS')
+    if not configured:
+        return DEFAULT_ICE_SERVERS
+    try:
+        return json.loads(configured)
+    except ValueError as e:
+        print(f"Ignoring invalid WEBRTC_ICE_SERVERS: {e}")
+        return DEFAULT_ICE_SERVERS
+
+
+def to_bgr(frame):
+    """av.VideoFrame (what WebRTC delivers) or ndarray -> BGR ndarray."""
+    if isinstance(frame, np.ndarray):
+        return frame
+    return frame.to_ndarray(format='bgr24')
+
+
+class FrameReceiverCapture:
+    """
+    cv2.VideoCapture look-alike over a WebRTC frame receiver, so LivePipeline can read a camera
+    that streams from the browser instead of one attached to the server.
+
+    receiver: anything with get_frames(timeout) -> list of frames, raising queue.Empty on timeout
+              (streamlit-webrtc's video_receiver, or TrackReceiver).
+    is_playing: optional callable; the capture reads as closed once it returns False.
+    owns_receiver: release() also stops the receiver (not for streamlit-webrtc's, which the component owns).
+    Only the newest of the frames received since the last read is decoded; the rest are dropped
+    (counted in `dropped`). read() fails after `max_wait` seconds without any frame.
+    """
+
+    def __init__(self, receiver, is_playing=None, owns_receiver=False, max_wait=10.0, poll_timeout=0.5):
+        self.receiver = receiver
+        self.is_playing = is_playing
+        self.owns_receiver = owns_receiver
+        self.max_wait = max_wait
+        self.poll_timeout = poll_timeout
+        self.dropped = 0
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened and (self.is_playing is None or self.is_playing())
+
+    def read(self):
+        waited_since = time.perf_counter()
+        while self.isOpened() and not getattr(self.receiver, 'ended', False):
+            try:
+                frames = self.receiver.get_frames(timeout=self.poll_timeout)
+            except queue.Empty:
+                if time.perf_counter() - waited_since > self.max_wait:
+                    break
+                continue
+            if not frames:
+                continue
+            self.dropped += len(frames) - 1
+            return True, to_bgr(frames[-1])
+        return False, None
+
+    def release(self):
+        if self._opened and self.owns_receiver:
+            self.receiver.stop()
+        self._opened = False
+
+
+class TrackReceiver:
+    """
+    Pulls frames from an aiortc MediaStreamTrack on its own event loop thread and offers them
+    through the same get_frames() as streamlit-webrtc's receiver. Used for the synthetic camera,
+    so the browser-camera path can be tested without a browser.
+    The track is stopped (and released, if it has a release() method) on the loop thread once
+    pulling ends, so it is never torn down while recv() is running.
+    """
+
+    def __init__(self, track, max_queue=4):
+        self.track = track
+        self.ended = False
+        self._frames = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._pull()), daemon=True)
+        self._thread.start()
+
+    async def _pull(self):
+        try:
+            while not self._stop_event.is_set():
+                frame = await self.track.recv()
+                if self._frames.full():
+                    try:
+                        self._frames.get_nowait()  # Keep the newest frames only
+                    except queue.Empty:
+                        pass
+                self._frames.put_nowait(frame)
+        except Exception as e:
+            # MediaStreamError when the track ends
+            if not self._stop_event.is_set():
+                print(f"Video track ended: {e!r}")
+        finally:
+            self.ended = True
+            self.track.stop()
+            release = getattr(self.track, 'release', None)
+            if release is not None:
+                release()
+
+    def get_frames(self, timeout=None):
+        frames = [self._frames.get(timeout=timeout)]
+        while True:
+            try:
+                frames.append(self._frames.get_nowait())
+            except queue.Empty:
+                return frames
+
+    def stop(self):
+        # _pull() sees the event after the current recv() and cleans up the track on its own thread
+        self._stop_event.set()
+        self._thread.join(timeout=2)
+
+
+def create_synthetic_track(video_path):
+    """
+    An aiortc video track that plays `video_path` in a loop (paced at 30 fps by aiortc), standing in for a browser
+    camera when testing locally (see benchmarks/synthetic.py for a generated squat video).
+    """
+    try:
+        import av
+        from aiortc import VideoStreamTrack
+    except ImportError:
+        raise ImportError("The synthetic camera needs `pip install streamlit-webrtc` (which installs aiortc)")
+
+    class SyntheticVideoTrack(VideoStreamTrack):
+        def __init__(self):
+            super().__init__()
+            self.cap = cv2.VideoCapture(video_path)
+
+        async def recv(self):
+            pts, time_base = await self.next_timestamp()
+            ret, frame = self.cap.read()
+            if not ret:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Loop
+                ret, frame = self.cap.read()
+            if not ret:
+                raise RuntimeError(f"Could not read {video_path}")
+            video_frame = av.VideoFrame.from_ndarray(frame, format='bgr24')
+            video_frame.pts = pts
+            video_frame.time_base = time_base
+            return video_frame
+
+        def release(self):
+            # Called by TrackReceiver on the event loop thread, after the last recv()
+            self.cap.release()
+
+    return SyntheticVideoTrack()
@@ -0,0 +1,302 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from utils.angle_utils import NUM_KEYPOINTS
+from yolo_model.model import DEFAULT_WEIGHTS, get_model_yolo
+
+# COCO keypoint connections used to draw the skeleton
+SKELETON = (
+    (5, 6), (5, 7), (7, 9), (6, 8), (8, 10),          # arms
+    (5, 11), (6, 12), (11, 12),                       # torso
+    (11, 13), (13, 15), (12, 14), (14, 16),           # legs
+    (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6),   # head
+)
+
+
+class PoseResult:
+    """
+    Backend-independent pose output for one frame.
+    keypoints: (P, 17, 3) float32 (x, y, confidence) in frame pixels, most confident person first
+    boxes:     (P, 5) float32 (x1, y1, x2, y2, confidence)
+    """
+
+    def __init__(self, keypoints, boxes, orig_img=None, raw=None):
+        self.keypoints = keypoints
+        self.boxes = boxes
+        self.orig_img = orig_img
+        self.raw = raw  # Native result object when the backend has one (e.g. Ultralytics Results)
+
+    def __len__(self):
+        return len(self.keypoints)
+
+    @classmethod
+    def empty(cls, orig_img=None):
+        return cls(np.zeros((0, NUM_KEYPOINTS, 3), dtype=np.float32),
+                   np.zeros((0, 5), dtype=np.float32), orig_img)
+
+    def plot(self):
+        """Returns a BGR copy of the frame with the detected skeletons drawn on it."""
+        if self.raw is not None and hasattr(self.raw, 'plot'):
+            return self.raw.plot()
+        annotated = self.orig_img.copy()
+        for person in self.keypoints:
+            for start, end in SKELETON:
+                if person[start, 2] > 0.5 and person[end, 2] > 0.5:
+                    cv2.line(annotated, tuple(int(v) for v in person[start, :2]),
+                             tuple(int(v) for v in person[end, :2]), (255, 128, 0), 2)
+            for x, y, conf in person:
+                if conf > 0.5:
+                    cv2.circle(annotated, (int(x), int(y)), 4, (0, 255, 0), -1)
+        return annotated
+
+
+class PoseBackend(ABC):
+    """
+    Abstract Base Class for pose inference backends.
+    Every backend takes BGR frames and returns one PoseResult per frame.
+    """
+
+    name = None
+
+    @abstractmethod
+    def predict(self, frames, imgsz=None):
+        """Run pose estimation on a list of BGR frames (imgsz overrides the input size where the model allows it)."""
+        pass
+
+    def __call__(self, frames, imgsz=None):
+        return self.predict(frames, imgsz)
+
+    def cache_id(self):
+        """What this backend's keypoints depend on: runtime, weights, input size and thresholds."""
+        return {'backend': self.name, 'model': getattr(self, 'model_path', None),
+                'imgsz': self.imgsz, 'conf': self.conf, 'iou': self.iou}
+
+    def warmup(self, imgsz=640, runs=1):
+        dummy_frame = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self.predict([dummy_frame])
+
+
+class UltralyticsBackend(PoseBackend):
+    """Ultralytics runtime (PyTorch weights, or any format Ultralytics can load)."""
+
+    name = 'ultralytics'
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, conf=0.25, iou=0.7, imgsz=640):
+        self.model = get_model_yolo(weights)
+        self.model_path = weights
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = imgsz
+
+    def predict(self, frames, imgsz=None):
+        results = self.model(list(frames), conf=self.conf, iou=self.iou, imgsz=imgsz or self.imgsz, verbose=False)
+        pose_results = []
+        for frame, result in zip(frames, results):
+            if result.keypoints is None or len(result.keypoints.data) == 0:
+                pose_result = PoseResult.empty(frame)
+            else:
+                pose_result = PoseResult(
+                    result.keypoints.data.cpu().numpy().astype(np.float32),
+                    result.boxes.data[:, :5].cpu().numpy().astype(np.float32),
+                    frame,
+                )
+            pose_result.raw = result
+            pose_results.append(pose_result)
+        return pose_results
+
+    def warmup(self, imgsz=640, runs=1):
+        # The shared model is already warmed up by the registry
+        pass
+
+
+def letterbox(frame, imgsz):
+    """Resizes keeping aspect ratio and pads to imgsz x imgsz, as Ultralytics does for exported models."""
+    height, width = frame.shape[:2]
+    gain = min(imgsz / height, imgsz / width)
+    new_width, new_height = int(round(width * gain)), int(round(height * gain))
+    if (new_width, new_height) != (width, height):
+        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    pad_x, pad_y = (imgsz - new_width) / 2, (imgsz - new_height) / 2
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return frame, gain, (left, top)
+
+
+class ExportedPoseBackend(PoseBackend):
+    """
+    Shared pre/post-processing for raw exported YOLO pose models.
+    The raw output is (B, 5 + 17 * 3, anchors): xywh box, person score, then keypoints.
+    """
+
+    def __init__(self, conf=0.25, iou=0.7, imgsz=640, max_det=300):
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = imgsz
+        self.max_det = max_det
+        self.fixed_batch = None  # Set by subclasses when the model only accepts a fixed batch size
+        self.fixed_imgsz = False  # Set by subclasses when the model only accepts self.imgsz inputs
+
+    @abstractmethod
+    def _run(self, blob):
+        """Runs the model on a (B, 3, imgsz, imgsz) float32 blob and returns the raw output."""
+        pass
+
+    def predict(self, frames, imgsz=None):
+        frames = list(frames)
+        if not frames:
+            return []
+        if imgsz is None or self.fixed_imgsz:
+            imgsz = self.imgsz
+        letterboxed = [letterbox(frame, imgsz) for frame in frames]
+        # One call does the BGR->RGB swap, scaling and HWC->CHW for the whole batch
+        blob = cv2.dnn.blobFromImages([image for image, _, _ in letterboxed], 1 / 255.0, swapRB=True)
+
+        if self.fixed_batch:
+            # Static-shape models: run in chunks of the exported batch size, padding the last one
+            outputs = []
+            for start in range(0, len(frames), self.fixed_batch):
+                chunk = blob[start:start + self.fixed_batch]
+                count = len(chunk)
+                if count < self.fixed_batch:
+                    padding = np.zeros((self.fixed_batch - count,) + chunk.shape[1:], dtype=chunk.dtype)
+                    chunk = np.concatenate([chunk, padding])
+                outputs.append(self._run(chunk)[:count])
+            output = np.concatenate(outputs)
+        else:
+            output = self._run(blob)
+
+        return [self._postprocess(output[i], frame, gain, pad)
+                for i, (frame, (_, gain, pad)) in enumerate(zip(frames, letterboxed))]
+
+    def _postprocess(self, prediction, frame, gain, pad):
+        prediction = prediction.T  # (anchors, 56)
+        prediction = prediction[prediction[:, 4] > self.conf]
+        if len(prediction) == 0:
+            return PoseResult.empty(frame)
+
+        scores = prediction[:, 4]
+        xywh = prediction[:, :4]
+        top_left_boxes = np.column_stack((xywh[:, 0] - xywh[:, 2] / 2, xywh[:, 1] - xywh[:, 3] / 2, xywh[:, 2], xywh[:, 3]))
+        keep = np.asarray(cv2.dnn.NMSBoxes(top_left_boxes.tolist(), scores.tolist(), self.conf, self.iou),
+                          dtype=np.intp).reshape(-1)[:self.max_det]
+        keep = keep[np.argsort(-scores[keep], kind='stable')]
+        prediction = prediction[keep]
+
+        # Undo the letterbox so coordinates are in original frame pixels
+        left, top = pad
+        height, width = frame.shape[:2]
+        boxes = np.empty((len(prediction), 5), dtype=np.float32)
+        boxes[:, 0] = (prediction[:, 0] - prediction[:, 2] / 2 - left) / gain
+        boxes[:, 1] = (prediction[:, 1] - prediction[:, 3] / 2 - top) / gain
+        boxes[:, 2] = (prediction[:, 0] + prediction[:, 2] / 2 - left) / gain
+        boxes[:, 3] = (prediction[:, 1] + prediction[:, 3] / 2 - top) / gain
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        boxes[:, 4] = prediction[:, 4]
+
+        keypoints = prediction[:, 5:].reshape(-1, NUM_KEYPOINTS, 3).astype(np.float32)
+        keypoints[..., 0] = ((keypoints[..., 0] - left) / gain).clip(0, width)
+        keypoints[..., 1] = ((keypoints[..., 1] - top) / gain).clip(0, height)
+        return PoseResult(keypoints, boxes, frame)
+
+
+class OnnxRuntimeBackend(ExportedPoseBackend):
+    """ONNX Runtime on CPU with explicit thread counts."""
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, num_threads=None, conf=0.25, iou=0.7, imgsz=640):
+        super().__init__(conf=conf, iou=iou, imgsz=imgsz)
+        self.model_path = model_path
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnxruntime backend needs `pip install onnxruntime`")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        input_shape = self.session.get_inputs()[0].shape
+        self.fixed_batch = input_shape[0] if isinstance(input_shape[0], int) else None
+        self.fixed_imgsz = isinstance(input_shape[2], int)
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoBackend(ExportedPoseBackend):
+    """OpenVINO runtime on CPU (FP32 or INT8 IR exported by yolo_model/export.py)."""
+
+    name = 'openvino'
+
+    def __init__(self, model_path, num_threads=None, conf=0.25, iou=0.7, imgsz=640):
+        super().__init__(conf=conf, iou=iou, imgsz=imgsz)
+        self.model_path = model_path
+        try:
+            import openvino as ov
+        except ImportError:
+            raise ImportError("The openvino backend needs `pip install openvino`")
+
+        if os.path.isdir(model_path):
+            model_path = next(os.path.join(model_path, name) for name in os.listdir(model_path) if name.endswith('.xml'))
+        core = ov.Core()
+        model = core.read_model(model_path)
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if num_threads:
+            config['INFERENCE_NUM_THREADS'] = num_threads
+        self.compiled_model = core.compile_model(model, 'CPU', config)
+        input_shape = model.inputs[0].get_partial_shape()
+        self.fixed_batch = input_shape[0].get_length() if input_shape[0].is_static else None
+        self.fixed_imgsz = input_shape[2].is_static
+        self._lock = threading.Lock()  # Infer requests aren't shared between threads
+
+    def _run(self, blob):
+        with self._lock:
+            return self.compiled_model(blob)[0]
+
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVinoBackend.name: OpenVinoBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name=None, model_path=None, num_threads=None, warmup=True):
+    """
+    Returns the process-wide backend for (name, model_path), creating it on first use.
+    Defaults come from the POSE_BACKEND, POSE_MODEL_PATH and POSE_NUM_THREADS environment variables.
+    """
+    name = name or os.environ.get('POSE_BACKEND', UltralyticsBackend.name)
+    model_path = model_path or os.environ.get('POSE_MODEL_PATH', DEFAULT_WEIGHTS)
+    num_threads = num_threads or int(os.environ.get('POSE_NUM_THREADS', 0)) or None
+    if name not in BACKENDS:
+        raise ValueError(f"Pose backend {name} is not supported")
+
+    key = (name, model_path)
+    with _backends_lock:
+        if key not in _backends:
+            if name == UltralyticsBackend.name:
+                backend = UltralyticsBackend(model_path)
+            else:
+                backend = BACKENDS[name](model_path, num_threads=num_threads)
+            if warmup:
+                start = time.perf_counter()
+                backend.warmup()
+                print(f"Warmed up {name} backend ({model_path}) in {time.perf_counter() - start:.2f}s")
+            _backends[key] = backend
+    return _backends[key]
@@ -0,0 +1,79 @@
+"""
+Exports the YOLO pose weights for the optimized CPU backends and checks that they agree
+with the PyTorch model.
+
+    python -m yolo_model.export --format onnx
+    python -m yolo_model.export --format openvino --int8
+    python -m yolo_model.export --format onnx --verify path/to/frame.jpg
+
+Then run the app with e.g. POSE_BACKEND=onnxruntime POSE_MODEL_PATH=yolo11n-pose.onnx.
+"""
+
+import argparse
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from yolo_model.backends import get_backend
+from yolo_model.model import DEFAULT_WEIGHTS
+
+
+def export_model(weights=DEFAULT_WEIGHTS, export_format='onnx', imgsz=640, int8=False, dynamic=True):
+    """
+    Exports `weights` and returns the path of the exported model.
+    ONNX models are exported with a dynamic batch axis so frames can be batched.
+    INT8 (OpenVINO only) is calibrated on the small coco8-pose dataset.
+    """
+    model = YOLO(weights)
+    if export_format == 'onnx':
+        return model.export(format='onnx', imgsz=imgsz, dynamic=dynamic, simplify=True)
+    if export_format == 'openvino':
+        options = {'format': 'openvino', 'imgsz': imgsz, 'dynamic': dynamic}
+        if int8:
+            options.update(int8=True, data='coco8-pose.yaml')
+        return model.export(**options)
+    raise ValueError(f"Export format {export_format} is not supported")
+
+
+def compare_backends(reference, candidate, frames, min_confidence=0.5):
+    """
+    Returns the largest keypoint difference (pixels) between two backends on the given frames,
+    over keypoints both backends are confident about. Both backends must detect the same number
+    of people for the comparison to be meaningful.
+    """
+    worst = 0.0
+    for expected, actual in zip(reference.predict(frames), candidate.predict(frames)):
+        if len(expected) != len(actual):
+            return float('inf')
+        if len(expected) == 0:
+            continue
+        confident = (expected.keypoints[..., 2] > min_confidence) & (actual.keypoints[..., 2] > min_confidence)
+        if confident.any():
+            difference = np.abs(expected.keypoints[..., :2] - actual.keypoints[..., :2])[confident]
+            worst = max(worst, float(difference.max()))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export YOLO pose weights for CPU inference backends.")
+    parser.add_argument('--weights', default=DEFAULT_WEIGHTS)
+    parser.add_argument('--format', choices=['onnx', 'openvino'], default='onnx')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--int8', action='store_true', help="INT8 quantization (OpenVINO only)")
+    parser.add_argument('--verify', metavar='IMAGE', help="Compare the exported model against PyTorch on this image")
+    args = parser.parse_args()
+
+    exported_path = export_model(args.weights, args.format, args.imgsz, args.int8)
+    print(f"Exported {args.weights} to {exported_path}")
+
+    if args.verify:
+        frame = cv2.imread(args.verify)
+        backend_name = 'onnxruntime' if args.format == 'onnx' else 'openvino'
+        difference = compare_backends(get_backend('ultralytics', args.weights),
+                                      get_backend(backend_name, exported_path), [frame])
+        print(f"Max keypoint difference vs PyTorch: {difference:.2f}px")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,80 @@
+import threading
+import time
+
+import numpy as np
 from ultralytics import YOLO
 
-def get_model_yolo():
-    model = YOLO("yolo11n-pose.pt")
-    return model
+DEFAULT_WEIGHTS = "yolo11n-pose.pt"
+
+# Process-wide model registry: each weight file is loaded (and warmed up) once per process
+# and shared by every Streamlit session and rerun.
+_models = {}
+_load_info = {}
+_registry_lock = threading.Lock()
+
+
+class SharedModel:
+    """
+    Wraps a YOLO model shared between sessions. Ultralytics predictors are not thread-safe,
+    so calls are serialised; every other attribute is delegated to the wrapped model.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self.model(*args, **kwargs)
+
+    def predict(self, *args, **kwargs):
+        with self._lock:
+            return self.model.predict(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def warmup_model(model, imgsz=640, runs=1):
+    """Runs dummy inferences so the first real frame doesn't pay for lazy initialisation."""
+    dummy_frame = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    for _ in range(runs):
+        model(dummy_frame, verbose=False)
+
+
+def get_model_yolo(weights=DEFAULT_WEIGHTS, warmup=True):
+    """Returns the shared YOLO model for `weights`, loading and warming it up on first use."""
+    model = _models.get(weights)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        if weights not in _models:
+            start = time.perf_counter()
+            model = YOLO(weights)
+            load_seconds = time.perf_counter() - start
+
+            warmup_seconds = 0.0
+            if warmup:
+                start = time.perf_counter()
+                warmup_model(model)
+                warmup_seconds = time.perf_counter() - start
+
+            _models[weights] = SharedModel(model)
+            _load_info[weights] = {'load_seconds': load_seconds, 'warmup_seconds': warmup_seconds}
+            print(f"Loaded {weights} in {load_seconds:.2f}s (warmup {warmup_seconds:.2f}s)")
+    return _models[weights]
+
+
+def get_model_load_info(weights=DEFAULT_WEIGHTS):
+    """Load and warmup times of a registered model, or None if it hasn't been loaded."""
+    return _load_info.get(weights)
 
 
 def get_pose(image_path):
-    model = get_model()
+    model = get_model_yolo()
     result = model.predict(source = image_path)
     return result, get_feedback(result)# , exercise)
 
 def get_feedback(result):#, exercise):
-    return "feedback"
\ No newline at end of file
+    return "feedback"